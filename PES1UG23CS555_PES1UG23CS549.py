@@ -1,10 +1,18 @@
+import functools
+import os
+from contextlib import contextmanager
+
 import streamlit as st
-import mysql.connector
 from mysql.connector import Error
 import pandas as pd
 import plotly.express as px
 from datetime import date, datetime
 
+import lifecycle
+import metrics
+import patent_db
+import reviewer_index
+
 
 # Session initialization
 
@@ -13,6 +21,7 @@ def init_state():
     ss.setdefault("logged_in", False)
     ss.setdefault("role", None)         # "Admin", "Inventor", "Reviewer"
     ss.setdefault("user_id", None)
+    ss.setdefault("org_id", None)       # tenant: inventor's own org, or picked by Admin/Guest
     ss.setdefault("username", None)
     ss.setdefault("show_login", False)
     ss.setdefault("show_inv_register", False)
@@ -23,75 +32,111 @@ def init_state():
 init_state()
 
 
-# DB connection helper
+# DB connection helpers
+
+USE_FRAGMENTS = os.environ.get("PATENT_FRAGMENTS", "1") != "0"
 
-def get_db_connection():
+@st.cache_resource
+def get_db_pools():
+    return patent_db.make_pools()
+
+def get_db_router():
     try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="svarsha08112005",
-            database="patent_system",
-            autocommit=False
-        )
-        return conn
+        primary_pool, replica_pools = get_db_pools()
     except Error as e:
         st.error(f"Database connection failed: {e}")
         return None
+    return patent_db.ConnectionRouter(primary_pool, replica_pools, session=st.session_state)
+
+@st.cache_resource
+def get_reviewer_index():
+    # Shared by every session in the process; refresh() folds in new completions.
+    return reviewer_index.ReviewerIndex()
+
+def db_fragment(fn):
+    """Run a page section as an st.fragment with its own pooled connection.
+
+    A widget change inside the section reruns only the section, after the
+    page's connection has gone back to the pool, so each run checks one out
+    here. PATENT_FRAGMENTS=0 renders sections inline (full-page reruns).
+    """
+    @functools.wraps(fn)
+    def section(*args, **kwargs):
+        router = get_db_router()
+        if not router:
+            return
+        try:
+            with page_metrics(fn.__name__):
+                fn(router.primary(), *args, **kwargs)
+        finally:
+            router.close()
+            export_metrics()
+    return st.fragment(section) if USE_FRAGMENTS else section
+
+def note_write():
+    # Keep this session's reads on the primary until replicas catch up.
+    patent_db.mark_session_written(st.session_state)
+
+
+# Metrics
+
+@st.cache_resource
+def start_metrics_endpoint():
+    # One scrape endpoint per process, enabled by PATENT_METRICS_PORT.
+    port = os.environ.get("PATENT_METRICS_PORT")
+    return metrics.start_http_server(int(port)) if port else None
+
+def export_metrics():
+    path = os.environ.get("PATENT_METRICS_FILE")
+    if path:
+        metrics.write_textfile(path)
+
+@contextmanager
+def page_metrics(page):
+    # Render time and SQL statements for one page or fragment run; a page's
+    # numbers include the fragments rendered inside it.
+    labels = dict(role=st.session_state.get("role") or "Guest", page=page)
+    statements = patent_db.statements_in_thread()
+    try:
+        with metrics.PAGE_RENDER_SECONDS.time(**labels):
+            yield
+    finally:
+        metrics.PAGE_DB_STATEMENTS.observe(patent_db.statements_in_thread() - statements, **labels)
+
+def timed_page(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with page_metrics(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# Widget helpers
+
+def render_org_picker(conn):
+    # Admins and guests browse one organization (tenant) at a time.
+    orgs = patent_db.get_organizations(conn)
+    if orgs.empty:
+        st.info("No organizations registered yet.")
+        st.session_state.org_id = None
+        return
+    names = orgs.set_index("Org_ID")["Name"]
+    ids = names.index.tolist()
+    current = st.session_state.org_id if st.session_state.org_id in ids else ids[0]
+    st.session_state.org_id = st.selectbox("Organization", ids, index=ids.index(current),
+                                           format_func=lambda o: names[o])
 
-
-# Query helpers
-
-def df_from_query(conn, query, params=None, columns=None):
-    cur = conn.cursor()
-    cur.execute(query, params or ())
-    rows = cur.fetchall()
-    if not rows:
-        return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
-    if columns:
-        return pd.DataFrame(rows, columns=columns)
-    else:
-        cols = [c[0] for c in cur.description] if cur.description else None
-        return pd.DataFrame(rows, columns=cols) if cols else pd.DataFrame(rows)
-
-def get_total_patents(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM Patents")
-    return cur.fetchone()[0]
-
-def get_active_patents(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM Patents WHERE Status='Granted'")
-    return cur.fetchone()[0]
-
-def get_expired_patents(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM Patents WHERE Status='Expired'")
-    return cur.fetchone()[0]
-
-def get_upcoming_renewals(conn):
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT COUNT(*) FROM Renewals
-        WHERE Expiry_Date > CURDATE() AND Expiry_Date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)
-    """)
-    return cur.fetchone()[0]
-
-def get_domains(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT DISTINCT Domain FROM Patents WHERE Domain IS NOT NULL ORDER BY Domain")
-    return [r[0] for r in cur.fetchall()]
-
-def get_patent_list(conn):
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT P_ID, Title, Filing_Date, Domain, Status, Patent_Type, Appl_Name FROM Patents ORDER BY Title")
-    return cur.fetchall()
+def patent_selectbox(patents, label="Select Patent", tag="ID"):
+    # Options are plain P_IDs; titles are looked up only when rendering labels.
+    titles = patents.set_index("P_ID")["Title"]
+    return st.selectbox(label, titles.index.tolist(), format_func=lambda p: f"{titles[p]} ({tag}:{p})")
 
 
 # Guest UI
 
-def render_guest_shell(conn):
+def render_guest_shell(router):
     with st.sidebar:
+        render_org_picker(router.reader())
         st.markdown("### Navigation")
         view = st.radio("Go to:", ["Home", "Public Stats"])
         st.markdown("---")
@@ -132,57 +177,63 @@ def render_guest_shell(conn):
 
     # Routing for guest flows
     if st.session_state.show_inv_register:
-        render_inventor_register(conn)
+        render_inventor_register(router.primary())
         return
     if st.session_state.show_rev_register:
-        render_reviewer_register(conn)
+        render_reviewer_register(router.primary())
         return
     if st.session_state.show_opposition:
-        render_public_opposition(conn)
+        render_public_opposition(router.primary())
         return
     if st.session_state.show_login:
-        render_login(conn)
+        render_login(router.primary())
         return
 
     # Guest pages
     if st.session_state._guest_page == "age_calc":
-        age_calculator_ui(conn, allow_inventor=False)  # guest mode
+        age_calculator_ui(router.reader(), allow_inventor=False)  # guest mode
         return
     if st.session_state._guest_page == "domain_proc":
-        domain_procedure_ui(conn)
+        domain_procedure_ui(router.reader())
         return
     if st.session_state._guest_page == "join_view":
-        join_query_view(conn)
+        join_query_view(router.reader())
         return
     if st.session_state._guest_page == "nested_view":
-        nested_query_view(conn)
+        nested_query_view(router.reader())
         return
     if st.session_state._guest_page == "agg_view":
-        aggregate_query_view(conn)
+        aggregate_query_view(router.reader())
         return
 
     if view == "Home":
         render_home_page()
     else:
-        render_public_stats(conn)
+        render_public_stats(router.reader())
 
+@timed_page
 def render_home_page():
     st.title("📜 Patent Lifecycle Management System")
     st.write("Use the sidebar to navigate. Guest sidebar contains Patent Age Calculator, Get Patents by Domain and query viewers.")
     st.markdown("---")
     st.write("You can register as Inventor/Reviewer or log in from the sidebar.")
 
+def render_stat_metrics(conn):
+    stats = patent_db.get_portfolio_stats(conn, st.session_state.org_id)
+    c1,c2,c3,c4 = st.columns(4)
+    c1.metric("Total Patents", stats.total)
+    c2.metric("Active (Granted)", stats.granted)
+    c3.metric("Expired", stats.expired)
+    c4.metric("Renewals (30d)", stats.renewals_due_30d)
+
+@timed_page
 def render_public_stats(conn):
     st.title("📊 Public Patent Statistics")
-    c1,c2,c3,c4 = st.columns(4)
-    c1.metric("Total Patents", get_total_patents(conn))
-    c2.metric("Active (Granted)", get_active_patents(conn))
-    c3.metric("Expired", get_expired_patents(conn))
-    c4.metric("Renewals (30d)", get_upcoming_renewals(conn))
+    render_stat_metrics(conn)
 
     st.markdown("---")
-    df_dom = df_from_query(conn, "SELECT Domain, COUNT(*) as Count FROM Patents GROUP BY Domain", columns=["Domain","Count"])
-    df_type = df_from_query(conn, "SELECT Patent_Type, COUNT(*) as Count FROM Patents GROUP BY Patent_Type", columns=["Patent_Type","Count"])
+    df_dom = patent_db.get_domain_counts(conn, st.session_state.org_id)
+    df_type = patent_db.get_type_counts(conn, st.session_state.org_id)
 
     col1, col2 = st.columns(2)
     with col1:
@@ -201,6 +252,7 @@ def render_public_stats(conn):
 
 # Registration / Login / Opposition
 
+@timed_page
 def render_inventor_register(conn):
     st.header("👨‍🔧 Register as Inventor")
     with st.form("inv_reg"):
@@ -214,30 +266,26 @@ def render_inventor_register(conn):
     if not submitted:
         return
 
-    if not name or not email or not password:
-        st.error("Name, Email and Password are required.")
+    if not name or not org.strip() or not email or not password:
+        st.error("Name, Organization, Email and Password are required.")
         return
     if password != confirm:
         st.error("Passwords do not match.")
         return
 
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM Inventors WHERE Email=%s", (email,))
-        if cur.fetchone()[0] > 0:
+        if patent_db.inventor_email_exists(conn, email):
             st.error("Email already registered as inventor.")
             return
-        cur.execute("""
-            INSERT INTO Inventors (Name, Organization, Email, Phone_No, Password)
-            VALUES (%s,%s,%s,%s,%s)
-        """, (name, org, email, phone, password))
-        conn.commit()
+        patent_db.register_inventor(conn, name, org, email, phone, password)
+        note_write()
         st.success("Inventor registered successfully. You can login from the sidebar.")
         st.session_state.show_inv_register = False
         st.rerun()
     except Exception as e:
         st.error(f"Registration failed: {e}")
 
+@timed_page
 def render_reviewer_register(conn):
     st.header("👨⚖ Register as Reviewer")
     with st.form("rev_reg"):
@@ -259,22 +307,18 @@ def render_reviewer_register(conn):
         return
 
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM Reviewers WHERE Email=%s", (email,))
-        if cur.fetchone()[0] > 0:
+        if patent_db.reviewer_email_exists(conn, email):
             st.error("Email already registered as reviewer.")
             return
-        cur.execute("""
-            INSERT INTO Reviewers (Email, Name, Designation, Organisation, Comment, Password, Is_Active)
-            VALUES (%s,%s,%s,%s,%s,%s,TRUE)
-        """, (email, name, designation, org, "", password))
-        conn.commit()
+        patent_db.register_reviewer(conn, name, designation, org, email, password)
+        note_write()
         st.success("Reviewer registered successfully. You can login from the sidebar.")
         st.session_state.show_rev_register = False
         st.rerun()
     except Exception as e:
         st.error(f"Registration failed: {e}")
 
+@timed_page
 def render_public_opposition(conn):
     st.header("⚖ File an Opposition")
     with st.form("opp_form"):
@@ -288,16 +332,15 @@ def render_public_opposition(conn):
         st.error("Email, Patent Title and Reason are required.")
         return
     try:
-        cur = conn.cursor()
-        cur.execute("INSERT INTO Patents_Opposition (Email, Patent_Title, O_Date, Reason) VALUES (%s,%s,CURDATE(),%s)",
-                    (email, patent_title, reason))
-        conn.commit()
+        patent_db.file_opposition(conn, st.session_state.org_id, email, patent_title, reason)
+        note_write()
         st.success("Opposition submitted successfully.")
         st.session_state.show_opposition = False
         st.rerun()
     except Exception as e:
         st.error(f"Failed to submit opposition: {e}")
 
+@timed_page
 def render_login(conn):
     st.header("🔐 Login")
     with st.form("login_form"):
@@ -312,6 +355,7 @@ def render_login(conn):
         if role == "Admin":
             # Admin credentials (simple static check)
             if email == "admin@system.com" and password == "admin123":
+                metrics.LOGIN_ATTEMPTS.inc(role=role, outcome="success")
                 st.session_state.logged_in = True
                 st.session_state.role = "Admin"
                 st.session_state.username = "Administrator"
@@ -319,53 +363,57 @@ def render_login(conn):
                 st.session_state.show_login = False
                 st.rerun()
             else:
+                metrics.LOGIN_ATTEMPTS.inc(role=role, outcome="failure")
                 st.error("Invalid admin credentials.")
             return
 
         if role == "Inventor":
-            cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT I_ID, Name FROM Inventors WHERE Email=%s AND Password=%s", (email, password))
-            row = cur.fetchone()
-            if not row:
+            account = patent_db.authenticate_inventor(conn, email, password)
+            if not account:
+                metrics.LOGIN_ATTEMPTS.inc(role=role, outcome="failure")
                 st.error("Invalid inventor email or password.")
                 return
+            metrics.LOGIN_ATTEMPTS.inc(role=role, outcome="success")
             st.session_state.logged_in = True
             st.session_state.role = "Inventor"
-            st.session_state.user_id = row["I_ID"]
-            st.session_state.username = row["Name"]
+            st.session_state.user_id = account.user_id
+            st.session_state.org_id = account.org_id
+            st.session_state.username = account.name
             st.session_state.show_login = False
-            st.success(f"Welcome, {row['Name']}!")
+            st.success(f"Welcome, {account.name}!")
             st.rerun()
             return
 
         if role == "Reviewer":
-            cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT R_ID, Name FROM Reviewers WHERE Email=%s AND Password=%s", (email, password))
-            row = cur.fetchone()
-            if not row:
+            account = patent_db.authenticate_reviewer(conn, email, password)
+            if not account:
+                metrics.LOGIN_ATTEMPTS.inc(role=role, outcome="failure")
                 st.error("Invalid reviewer email or password.")
                 return
+            metrics.LOGIN_ATTEMPTS.inc(role=role, outcome="success")
             st.session_state.logged_in = True
             st.session_state.role = "Reviewer"
-            st.session_state.user_id = row["R_ID"]
-            st.session_state.username = row["Name"]
+            st.session_state.user_id = account.user_id
+            st.session_state.username = account.name
             st.session_state.show_login = False
-            st.success(f"Welcome, {row['Name']}!")
+            st.success(f"Welcome, {account.name}!")
             st.rerun()
             return
 
     except Exception as e:
+        metrics.LOGIN_ATTEMPTS.inc(role=role, outcome="error")
         st.error(f"Login failed: {e}")
 
 
 # Logged-in shell (role-specific sidebars)
 
-def render_logged_in_shell(conn):
+def render_logged_in_shell(router):
     with st.sidebar:
         st.markdown(f"### 👤 {st.session_state.role} Menu")
         st.caption(f"Logged in as: {st.session_state.username}")
 
         if st.session_state.role == "Admin":
+            render_org_picker(router.primary())
             page = st.radio("Go to:", ["Overview", "Assign Reviewers", "Update Patent Status"])
         elif st.session_state.role == "Inventor":
             page = st.radio("Go to:", ["Inventor Overview", "My Patents", "Add New Patent", "Patent Age Calculator"])
@@ -377,88 +425,66 @@ def render_logged_in_shell(conn):
             logout()
             st.rerun()
 
-    # Route pages
+    # Route pages (read-only pages may be served by a replica)
     if st.session_state.role == "Admin":
         if page == "Overview":
-            admin_overview(conn)
+            admin_overview(router.primary())
         elif page == "Assign Reviewers":
-            admin_assign_reviewers(conn)
+            admin_assign_reviewers(router.primary())
         elif page == "Update Patent Status":
-            admin_update_patent_status(conn)
+            admin_update_patent_status(router.primary())
     elif st.session_state.role == "Inventor":
         if page == "Inventor Overview":
-            inventor_overview(conn)
+            inventor_overview(router.primary())
         elif page == "My Patents":
-            inventor_my_patents(conn)
+            inventor_my_patents(router.primary())
         elif page == "Add New Patent":
-            inventor_add_patent(conn)
+            inventor_add_patent(router.primary())
         else:  # Patent Age Calculator for inventor
-            age_calculator_ui(conn, allow_inventor=True)
+            age_calculator_ui(router.primary(), allow_inventor=True)
     else:  # Reviewer
         if page == "Reviewer Overview":
-            reviewer_overview(conn)
+            reviewer_overview(router.primary())
         elif page == "Assigned Reviews":
-            reviewer_assigned_reviews(conn)
+            reviewer_assigned_reviews(router.primary())
         else:
-            reviewer_history(conn)
+            reviewer_history(router.reader())
 
 
 # Admin pages
 
+@timed_page
 def admin_overview(conn):
     st.title("Admin — Overview")
+    org_id = st.session_state.org_id
     # Top metrics
-    c1,c2,c3,c4 = st.columns(4)
-    c1.metric("Total Patents", get_total_patents(conn))
-    c2.metric("Active (Granted)", get_active_patents(conn))
-    c3.metric("Expired", get_expired_patents(conn))
-    c4.metric("Renewals (30d)", get_upcoming_renewals(conn))
+    render_stat_metrics(conn)
 
-    st.markdown("### Manage Patents (editable)")
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT P_ID, Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description FROM Patents ORDER BY P_ID")
-    rows = cur.fetchall() or []
-    df = pd.DataFrame(rows)
-    if df.empty:
-        df = pd.DataFrame(columns=["P_ID","Appl_Name","Filing_Date","Domain","Status","Patent_Type","Title","Description"])
+    # Sections with widgets are fragments: interacting with one reruns only
+    # that section, and its reads come from the per-tenant cache.
+    overview_patents_grid(org_id)
 
-    edited = st.data_editor(df, key="admin_patents_editor", num_rows="dynamic")
+    st.markdown("---")
+    overview_trends(org_id)
 
-    if st.button("Save Patent Changes"):
-        try:
-            cur2 = conn.cursor()
-            for r in edited.to_dict("records"):
-                cur2.execute("""
-                    UPDATE Patents SET Appl_Name=%s, Filing_Date=%s, Domain=%s, Status=%s, Patent_Type=%s, Title=%s, Description=%s
-                    WHERE P_ID=%s
-                """, (
-                    r.get("Appl_Name"),
-                    r.get("Filing_Date"),
-                    r.get("Domain"),
-                    r.get("Status"),
-                    r.get("Patent_Type"),
-                    r.get("Title"),
-                    r.get("Description"),
-                    r.get("P_ID")
-                ))
-            conn.commit()
-            st.success("Patent changes saved (DB triggers will fire on update).")
-            st.rerun()
-        except Exception as e:
-            st.error(f"Failed to save changes: {e}")
+    st.markdown("---")
+    overview_maintenance(org_id)
+
+    st.markdown("---")
+    st.markdown("### Likely duplicates")
+    try:
+        df_dup = patent_db.get_duplicate_clusters(conn, org_id)
+        if not df_dup.empty:
+            st.dataframe(df_dup, use_container_width=True, hide_index=True)
+        else:
+            st.info("No likely duplicates found by the last scan (`python jobs.py dedup-scan`).")
+    except Exception:
+        st.info("Duplicate scan results not available.")
 
     st.markdown("---")
     st.markdown("### Reviewer performance (simple)")
     try:
-        df_work = df_from_query(conn, """
-            SELECT R.R_ID, R.Name, R.Email,
-              SUM(CASE WHEN PR.Review_Status='Completed' THEN 1 ELSE 0 END) AS CompletedReviews,
-              SUM(CASE WHEN PR.Review_Status <> 'Completed' AND PR.Review_Status IS NOT NULL THEN 1 ELSE 0 END) AS PendingReviews
-            FROM Reviewers R
-            LEFT JOIN Patent_Reviewers PR ON R.R_ID = PR.R_ID
-            GROUP BY R.R_ID, R.Name, R.Email
-            ORDER BY PendingReviews DESC
-        """)
+        df_work = patent_db.get_reviewer_workload(conn, org_id)
         if not df_work.empty:
             st.dataframe(df_work, use_container_width=True)
         else:
@@ -469,11 +495,7 @@ def admin_overview(conn):
     st.markdown("---")
     st.markdown("### Oppositions (latest)")
     try:
-        df_opp = df_from_query(conn, """
-            SELECT O.O_ID, O.Email, O.Patent_Title, O.O_Date, O.Reason
-            FROM Patents_Opposition O
-            ORDER BY O.O_Date DESC LIMIT 20
-        """, columns=["O_ID","Email","Patent_Title","O_Date","Reason"])
+        df_opp = patent_db.get_latest_oppositions(conn, org_id)
         if not df_opp.empty:
             st.dataframe(df_opp, use_container_width=True)
         else:
@@ -481,13 +503,85 @@ def admin_overview(conn):
     except Exception:
         st.info("Opposition table not accessible.")
 
-        st.markdown("---")
+    st.markdown("---")
+    overview_delete_operations(org_id)
+
+@db_fragment
+def overview_patents_grid(conn, org_id):
+    st.markdown("### Manage Patents (editable)")
+    df = patent_db.get_patents_grid(conn, org_id)
+
+    st.data_editor(df, key="admin_patents_editor", num_rows="dynamic")
+
+    if st.button("Save Patent Changes"):
+        try:
+            # The grid may come from the cache; write back only the cells edited here.
+            edits = st.session_state["admin_patents_editor"]["edited_rows"]
+            changes = {int(df["P_ID"].iloc[int(pos)]): row for pos, row in edits.items()}
+            patent_db.save_patent_rows(conn, org_id, changes)
+            note_write()
+            st.success("Patent changes saved (DB triggers will fire on update).")
+            st.rerun()
+        except Exception as e:
+            st.error(f"Failed to save changes: {e}")
+
+@db_fragment
+def overview_trends(conn, org_id):
+    st.markdown("### Portfolio trends")
+    c1, c2 = st.columns(2)
+    metric = c1.selectbox("Metric", list(patent_db.SNAPSHOT_METRICS),
+                          format_func=patent_db.SNAPSHOT_METRICS.get, key="trend_metric")
+    years = c2.selectbox("Range", [1, 3, 5], format_func=lambda y: f"Last {y} year(s)", key="trend_years")
+    end = date.today()
+    try:
+        df_trend = patent_db.get_snapshot_series(conn, org_id, metric, lifecycle.add_years([end], -years)[0].item(), end)
+        if not df_trend.empty:
+            fig = px.line(df_trend, x="Snap_Date", y="Value", color="Dim",
+                          labels={"Snap_Date": "Date", "Value": "Count", "Dim": ""})
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No snapshots yet. Schedule `python jobs.py snapshot` to run nightly.")
+    except Exception:
+        st.info("Portfolio snapshots not available.")
+
+@db_fragment
+def overview_maintenance(conn, org_id):
+    st.markdown("### Patent age & maintenance windows")
+    try:
+        cols = patent_db.get_filing_columns(conn, org_id)
+        today = date.today()
+        ages = lifecycle.age_distribution(cols.Filing_Date, today)
+        if not ages.empty:
+            fig = px.bar(ages, x="Age_Years", y="Patents", labels={"Age_Years": "Age (years)"})
+            st.plotly_chart(fig, use_container_width=True)
+
+        quarter = st.selectbox("Quarter", ["This quarter", "Next quarter"], key="maint_quarter")
+        q_start = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+        if quarter == "Next quarter":
+            q_start = lifecycle.add_months([q_start], 3)[0].item()
+        q_end = lifecycle.add_months([q_start], 3)[0].item()
+        report = lifecycle.maintenance_window_report(cols.P_ID, cols.Filing_Date, cols.Patent_Type,
+                                                     q_start, q_end, live=cols.Live)
+        if not report.empty:
+            titles = patent_db.get_patent_titles(conn, org_id, report["P_ID"].unique())
+            report = report.merge(titles, on="P_ID", how="left")
+            st.dataframe(report[["P_ID", "Title", "Fee_Year", "Window_Opens", "Due_Date", "Statutory_Expiry"]],
+                         use_container_width=True)
+        else:
+            st.info(f"No maintenance fees fall due between {q_start} and {q_end}.")
+    except Exception:
+        st.info("Maintenance report not available.")
+
+@db_fragment
+def overview_delete_operations(conn, org_id):
     st.header("🗑 Admin Delete Operations")
 
     delete_option = st.selectbox(
         "Select what you want to delete:",
         [
             "Delete Patent",
+            "Bulk Delete Patents (by filter)",
+            "Archive Expired/Withdrawn Patents",
             "Delete Inventor",
             "Delete Reviewer",
             "Delete Review Assignment",
@@ -502,22 +596,73 @@ def admin_overview(conn):
         p_id = st.number_input("Enter Patent ID (P_ID) to delete:", min_value=1)
         if st.button("Delete Patent Now"):
             try:
-                cur = conn.cursor()
-                cur.execute("DELETE FROM Patents WHERE P_ID=%s", (p_id,))
-                conn.commit()
+                patent_db.delete_patent(conn, org_id, p_id)
+                note_write()
                 st.success(f"Patent {p_id} deleted successfully (Cascade applied).")
                 st.rerun()
             except Exception as e:
                 st.error(f"Failed to delete patent: {e}")
 
+    # ----------------------- BULK DELETE PATENTS -----------------------
+    if delete_option == "Bulk Delete Patents (by filter)":
+        c1, c2 = st.columns(2)
+        statuses = c1.multiselect("Status", patent_db.PATENT_STATUSES, key="bulk_statuses")
+        domains = c2.multiselect("Domain", patent_db.get_domains(conn, org_id), key="bulk_domains")
+        filed_from = c1.date_input("Filed on or after", value=None, key="bulk_from")
+        filed_to = c2.date_input("Filed on or before", value=None, key="bulk_to")
+        criteria = dict(statuses=statuses, domains=domains, filed_from=filed_from, filed_to=filed_to)
+        if not any(criteria.values()):
+            st.info("Choose at least one filter to preview a bulk delete.")
+        else:
+            impact = patent_db.preview_bulk_delete(conn, org_id, **criteria)
+            st.dataframe(impact, use_container_width=True, hide_index=True)
+            n = int(impact.loc[impact["Table"] == "Patents", "Rows"].iloc[0])
+            c1, c2 = st.columns(2)
+            chunk_size = c1.number_input("Patents per transaction", min_value=50, max_value=5000, value=500, step=50)
+            pause = c2.number_input("Pause between chunks (seconds)", min_value=0.0, max_value=5.0, value=0.1, step=0.1)
+            confirm = st.checkbox(f"I understand this permanently deletes {n} patent(s) and the rows above.")
+            if st.button("Delete Matching Patents", disabled=not (confirm and n)):
+                bar = st.progress(0.0, text="Deleting...")
+                try:
+                    deleted = patent_db.bulk_delete_patents(
+                        conn, org_id, chunk_size=int(chunk_size), pause=pause,
+                        progress=lambda done, total: bar.progress(min(done / max(total, 1), 1.0),
+                                                                  text=f"Deleted {done} of {total} patents"),
+                        **criteria)
+                    note_write()
+                    st.success(f"Deleted {deleted} patent(s).")
+                except Exception as e:
+                    note_write()  # earlier chunks may have committed
+                    st.error(f"Bulk delete stopped: {e}")
+
+    # ----------------------- ARCHIVE PATENTS -----------------------
+    if delete_option == "Archive Expired/Withdrawn Patents":
+        st.caption("Moves expired and withdrawn patents and their child rows to the archive tables. "
+                   "They stay visible wherever \"include archived\" is offered. "
+                   "`python jobs.py archive` does the same on a schedule.")
+        impact = patent_db.preview_bulk_delete(conn, org_id, statuses=list(patent_db.ARCHIVE_STATUSES))
+        n = int(impact.loc[impact["Table"] == "Patents", "Rows"].iloc[0])
+        st.write(f"**{n}** patent(s) ready to archive.")
+        if st.button("Archive Now", disabled=not n):
+            bar = st.progress(0.0, text="Archiving...")
+            try:
+                moved = patent_db.archive_patents(
+                    conn, org_id,
+                    progress=lambda done, total: bar.progress(min(done / max(total, 1), 1.0),
+                                                              text=f"Archived {done} of {total} patents"))
+                note_write()
+                st.success(f"Archived {moved} patent(s).")
+            except Exception as e:
+                note_write()  # earlier chunks may have committed
+                st.error(f"Archiving stopped: {e}")
+
     # ----------------------- DELETE INVENTOR -----------------------
     if delete_option == "Delete Inventor":
         i_id = st.number_input("Enter Inventor ID (I_ID) to delete:", min_value=1)
         if st.button("Delete Inventor Now"):
             try:
-                cur = conn.cursor()
-                cur.execute("DELETE FROM Inventors WHERE I_ID=%s", (i_id,))
-                conn.commit()
+                patent_db.delete_inventor(conn, org_id, i_id)
+                note_write()
                 st.success(f"Inventor {i_id} deleted successfully.")
                 st.rerun()
             except Exception as e:
@@ -526,15 +671,28 @@ def admin_overview(conn):
     # ----------------------- DELETE REVIEWER -----------------------
     if delete_option == "Delete Reviewer":
         r_id = st.number_input("Enter Reviewer ID (R_ID) to delete:", min_value=1)
-        if st.button("Delete Reviewer Now"):
+        st.caption("Reviewers are deactivated rather than removed, so their review history is kept.")
+        c1, c2 = st.columns(2)
+        if c1.button("Delete Reviewer Now"):
             try:
-                cur = conn.cursor()
-                cur.execute("DELETE FROM Reviewers WHERE R_ID=%s", (r_id,))
-                conn.commit()
-                st.success(f"Reviewer {r_id} deleted successfully.")
-                st.rerun()
+                if patent_db.delete_reviewer(conn, r_id):
+                    note_write()
+                    get_reviewer_index().mark_stale()
+                    st.success(f"Reviewer {r_id} deactivated.")
+                else:
+                    st.info(f"Reviewer {r_id} not found or already inactive.")
             except Exception as e:
                 st.error(f"Failed to delete reviewer: {e}")
+        if c2.button("Restore Reviewer"):
+            try:
+                if patent_db.restore_reviewer(conn, r_id):
+                    note_write()
+                    get_reviewer_index().mark_stale()
+                    st.success(f"Reviewer {r_id} restored.")
+                else:
+                    st.info(f"Reviewer {r_id} not found or already active.")
+            except Exception as e:
+                st.error(f"Failed to restore reviewer: {e}")
 
     # ----------------------- DELETE REVIEW ASSIGNMENT -----------------------
     if delete_option == "Delete Review Assignment":
@@ -542,9 +700,8 @@ def admin_overview(conn):
         r_id = st.number_input("Reviewer ID (R_ID):", min_value=1)
         if st.button("Delete Review Assignment Now"):
             try:
-                cur = conn.cursor()
-                cur.execute("DELETE FROM Patent_Reviewers WHERE P_ID=%s AND R_ID=%s", (p_id, r_id))
-                conn.commit()
+                patent_db.delete_review_assignment(conn, org_id, p_id, r_id)
+                note_write()
                 st.success(f"Review assignment P_ID={p_id}, R_ID={r_id} deleted.")
                 st.rerun()
             except Exception as e:
@@ -555,9 +712,8 @@ def admin_overview(conn):
         o_id = st.number_input("Enter Opposition ID (O_ID):", min_value=1)
         if st.button("Delete Opposition Now"):
             try:
-                cur = conn.cursor()
-                cur.execute("DELETE FROM Patents_Opposition WHERE O_ID=%s", (o_id,))
-                conn.commit()
+                patent_db.delete_opposition(conn, org_id, o_id)
+                note_write()
                 st.success(f"Opposition {o_id} deleted successfully.")
                 st.rerun()
             except Exception as e:
@@ -569,9 +725,8 @@ def admin_overview(conn):
         r_no = st.number_input("Renewal Number (R_No):", min_value=1)
         if st.button("Delete Renewal Now"):
             try:
-                cur = conn.cursor()
-                cur.execute("DELETE FROM Renewals WHERE P_ID=%s AND R_No=%s", (p_id, r_no))
-                conn.commit()
+                patent_db.delete_renewal(conn, org_id, p_id, r_no)
+                note_write()
                 st.success(f"Renewal R_No={r_no} for Patent {p_id} deleted.")
                 st.rerun()
             except Exception as e:
@@ -582,92 +737,88 @@ def admin_overview(conn):
         cost_id = st.number_input("Cost Entry ID (Cost_ID):", min_value=1)
         if st.button("Delete Cost Entry Now"):
             try:
-                cur = conn.cursor()
-                cur.execute("DELETE FROM Patent_Costs WHERE Cost_ID=%s", (cost_id,))
-                conn.commit()
+                patent_db.delete_cost_entry(conn, org_id, cost_id)
+                note_write()
                 st.success(f"Cost entry {cost_id} deleted.")
                 st.rerun()
             except Exception as e:
                 st.error(f"Failed to delete cost entry: {e}")
 
 
+@timed_page
 def admin_assign_reviewers(conn):
     st.title("Assign Reviewers to Patent")
+    org_id = st.session_state.org_id
     # Load patents and reviewers
-    patents = get_patent_list(conn)
-    if not patents:
+    patents = patent_db.get_patent_list(conn, org_id)
+    if patents.empty:
         st.info("No patents found.")
         return
-    patent_map = {f"{p['Title']} (ID:{p['P_ID']})": p['P_ID'] for p in patents}
-    sel_patent_label = st.selectbox("Select Patent", list(patent_map.keys()))
-    p_id = patent_map[sel_patent_label]
+    p_id = patent_selectbox(patents)
 
     # reviewers list
-    reviewers_df = df_from_query(conn, "SELECT R_ID, Name, Email FROM Reviewers WHERE Is_Active=TRUE ORDER BY Name", columns=["R_ID","Name","Email"])
+    reviewers_df = patent_db.get_active_reviewers(conn)
     if reviewers_df.empty:
         st.info("No active reviewers available.")
         return
 
+    # Recommendations from the expertise index; already-assigned reviewers are skipped.
+    patent = patents.set_index("P_ID").loc[p_id]
+    index = get_reviewer_index()
+    ranked = []
+    try:
+        index.refresh(conn)
+        assigned_ids = patent_db.get_patent_assignments(conn, p_id)["R_ID"].tolist()
+        top = index.recommend(patent["Domain"], patent["Title"], k=5, exclude=assigned_ids)
+        if top:
+            st.markdown("Recommended reviewers:")
+            st.dataframe(pd.DataFrame(top, columns=reviewer_index.Recommendation._fields),
+                         use_container_width=True, hide_index=True)
+        ranked = index.rank(patent["Domain"], patent["Title"])
+    except Exception:
+        st.info("Reviewer recommendations not available.")
+
     st.markdown("Select one or more reviewers to assign:")
-    rev_options = {f"{r['Name']} ({r['Email']})": r['R_ID'] for _, r in reviewers_df.iterrows()}
-    chosen = st.multiselect("Choose reviewers", list(rev_options.keys()))
+    reviewers = reviewers_df.set_index("R_ID")
+    order = {r_id: i for i, r_id in enumerate(ranked)}
+    options = sorted(reviewers.index.tolist(), key=lambda r: order.get(r, len(order)))
+    chosen = st.multiselect("Choose reviewers (best match first)", options,
+                            format_func=lambda r: f"{reviewers.at[r, 'Name']} ({reviewers.at[r, 'Email']})")
     if st.button("Assign Selected Reviewers"):
         if not chosen:
             st.error("Select at least one reviewer.")
         else:
             try:
-                cur = conn.cursor()
-                assigned = 0
-                for ch in chosen:
-                    r_id = rev_options[ch]
-                    # Insert only if not already assigned
-                    cur.execute("SELECT COUNT(*) FROM Patent_Reviewers WHERE P_ID=%s AND R_ID=%s", (p_id, r_id))
-                    if cur.fetchone()[0] == 0:
-                        cur.execute("""
-                            INSERT INTO Patent_Reviewers (P_ID, R_ID, Reviewer_Name, Assignment_Date, Review_Status)
-                            VALUES (%s, %s, (SELECT Name FROM Reviewers WHERE R_ID=%s), CURDATE(), 'Assigned')
-                        """, (p_id, r_id, r_id))
-                        assigned += 1
-                conn.commit()
+                assigned = patent_db.assign_reviewers(conn, org_id, p_id, chosen)
+                note_write()
+                index.mark_stale()
                 st.success(f"Assigned {assigned} reviewer(s) to the patent.")
                 st.rerun()
             except Exception as e:
                 st.error(f"Assignment failed: {e}")
 
     st.markdown("Current assignments for this patent:")
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT PR.R_ID, PR.Reviewer_Name, PR.Assignment_Date, PR.Review_Status, PR.Review_Date, PR.Decision
-        FROM Patent_Reviewers PR
-        WHERE PR.P_ID=%s
-        ORDER BY PR.Assignment_Date DESC
-    """, (p_id,))
-    rows = cur.fetchall() or []
-    st.dataframe(rows, use_container_width=True)
+    st.dataframe(patent_db.get_patent_assignments(conn, p_id), use_container_width=True)
 
+@timed_page
 def admin_update_patent_status(conn):
     st.title("Update Patent Status")
-    patents = get_patent_list(conn)
-    if not patents:
+    org_id = st.session_state.org_id
+    patents = patent_db.get_patent_list(conn, org_id)
+    if patents.empty:
         st.info("No patents found.")
         return
-    patent_map = {f"{p['Title']} (ID:{p['P_ID']})": p['P_ID'] for p in patents}
-    sel_patent_label = st.selectbox("Select Patent", list(patent_map.keys()))
-    p_id = patent_map[sel_patent_label]
+    p_id = patent_selectbox(patents)
 
     # fetch current status
-    cur = conn.cursor()
-    cur.execute("SELECT Status FROM Patents WHERE P_ID=%s", (p_id,))
-    cur_status_row = cur.fetchone()
-    current_status = cur_status_row[0] if cur_status_row else None
+    current_status = patent_db.get_patent_status(conn, org_id, p_id)
 
     st.write(f"Current status: **{current_status}**")
-    new_status = st.selectbox("Set new status", ["Pending", "Under Review", "In Progress", "Approved", "Rejected", "Granted", "Expired", "Withdrawn"])
+    new_status = st.selectbox("Set new status", patent_db.PATENT_STATUSES)
     if st.button("Update Status"):
         try:
-            cur2 = conn.cursor()
-            cur2.execute("UPDATE Patents SET Status=%s WHERE P_ID=%s", (new_status, p_id))
-            conn.commit()
+            patent_db.update_patent_status(conn, org_id, p_id, new_status)
+            note_write()
             st.success("Patent status updated (DB trigger will log change).")
             st.rerun()
         except Exception as e:
@@ -676,31 +827,24 @@ def admin_update_patent_status(conn):
 
 # Patent Age Calculator (used by Guest and Inventor)
 
+@timed_page
 def age_calculator_ui(conn, allow_inventor=False):
     st.header("Patent Age Calculator (years & months)")
+    org_id = st.session_state.org_id
     # If allow_inventor True and user is inventor, show only their patents; else show all
     if allow_inventor and st.session_state.get("role") == "Inventor" and st.session_state.get("user_id"):
-        cur = conn.cursor(dictionary=True)
-        cur.execute("""
-            SELECT P.P_ID, P.Title, P.Filing_Date
-            FROM Patents P
-            JOIN Inventor_Patents IP ON P.P_ID = IP.P_ID
-            WHERE IP.I_ID = %s
-            ORDER BY P.Title
-        """, (st.session_state.user_id,))
-        patents = cur.fetchall()
+        patents = patent_db.get_inventor_patents(conn, org_id, st.session_state.user_id).sort_values("Title")
     else:
-        patents = get_patent_list(conn)
+        patents = patent_db.get_patent_list(conn, org_id)
 
-    if not patents:
+    if patents.empty:
         st.info("No patents available.")
         return
 
-    mapping = {f"{p['Title']} (ID:{p['P_ID']})": p for p in patents}
-    selected = st.selectbox("Select Patent", list(mapping.keys()))
-    rec = mapping[selected]
-    filing = rec.get("Filing_Date")
-    if not filing:
+    p_id = patent_selectbox(patents)
+    rec = patents.set_index("P_ID").loc[p_id]
+    filing = rec["Filing_Date"]
+    if pd.isna(filing):
         st.error("Filing date missing.")
         return
 
@@ -730,56 +874,46 @@ def age_calculator_ui(conn, allow_inventor=False):
 
     st.success(f"**{rec['Title']}** — Filing Date: {filing_date.isoformat()}")
     st.write(f"**Age:** {years} years and {months} months")
+    expiry = lifecycle.statutory_expiry([filing_date], [rec["Patent_Type"]])[0].item()
+    st.write(f"**Statutory expiry:** {expiry.isoformat()}")
+    if rec["Patent_Type"] not in lifecycle.NO_MAINTENANCE_TYPES:
+        dues = [d.item() for d in lifecycle.maintenance_due_dates([filing_date])[0]]
+        upcoming = [(y, d) for y, d in zip(lifecycle.MAINTENANCE_YEARS, dues) if d >= today]
+        if upcoming:
+            st.write(f"**Next maintenance fee:** year {upcoming[0][0]}, due {upcoming[0][1].isoformat()}")
 
 
 # Procedure page available only to Guest
 
+@timed_page
 def domain_procedure_ui(conn):
     st.header("Get Patents by Domain (Procedure)")
-    domains = get_domains(conn)
+    org_id = st.session_state.org_id
+    domains = patent_db.get_domains(conn, org_id)
     if not domains:
         st.info("No domains available.")
         return
     selected_domain = st.selectbox("Select Domain", domains)
     if st.button("Run Procedure"):
-        cur = conn.cursor()
         try:
-            cur.callproc("GetPatentsByDomain", [selected_domain])
-            results = []
-            cols = None
-            for result in cur.stored_results():
-                results = result.fetchall()
-                cols = [c[0] for c in result.description] if result.description else None
-            if results:
-                df = pd.DataFrame(results, columns=cols) if cols else pd.DataFrame(results)
+            df = patent_db.get_patents_by_domain(conn, org_id, selected_domain)
+            if not df.empty:
                 st.dataframe(df, use_container_width=True)
             else:
-                st.info("Procedure returned no rows.")
-        except Exception:
-            # fallback
-            try:
-                df = df_from_query(conn, "SELECT P_ID, Title, Appl_Name, Filing_Date, Status, All_Reviews_Complete FROM Patents WHERE Domain=%s ORDER BY Filing_Date DESC", (selected_domain,))
-                if not df.empty:
-                    st.dataframe(df, use_container_width=True)
-                else:
-                    st.info("No patents found for that domain.")
-            except Exception as e:
-                st.error(f"Procedure and fallback query both failed: {e}")
+                st.info("No patents found for that domain.")
+        except Exception as e:
+            st.error(f"Procedure and fallback query both failed: {e}")
 
 
 # Join / Nested / Aggregate viewers (Guest)
 
+@timed_page
 def join_query_view(conn):
     st.header("Join Query Viewer")
+    org_id = st.session_state.org_id
     st.write("Example: patent reviewers joined with patent and reviewer info.")
     try:
-        df = df_from_query(conn, """
-            SELECT PR.P_ID, P.Title AS Patent, PR.R_ID AS Reviewer_ID, R.Name AS Reviewer_Name, PR.Review_Status
-            FROM Patent_Reviewers PR
-            JOIN Patents P ON PR.P_ID = P.P_ID
-            JOIN Reviewers R ON PR.R_ID = R.R_ID
-            ORDER BY P.Title
-        """)
+        df = patent_db.get_join_view(conn, org_id)
         if df.empty:
             st.info("No join rows to display.")
         else:
@@ -787,21 +921,13 @@ def join_query_view(conn):
     except Exception as e:
         st.error(f"Join query failed: {e}")
 
+@timed_page
 def nested_query_view(conn):
     st.header("Nested Query Viewer")
+    org_id = st.session_state.org_id
     st.write("Example: reviewers who reviewed patents that are 'Granted'.")
     try:
-        df = df_from_query(conn, """
-            SELECT DISTINCT R.R_ID, R.Name, R.Email
-            FROM Reviewers R
-            WHERE R.R_ID IN (
-                SELECT PR.R_ID FROM Patent_Reviewers PR
-                WHERE PR.P_ID IN (
-                    SELECT P_ID FROM Patents WHERE Status='Granted'
-                )
-            )
-            ORDER BY R.Name
-        """)
+        df = patent_db.get_nested_view(conn, org_id)
         if df.empty:
             st.info("No nested-query results.")
         else:
@@ -809,90 +935,98 @@ def nested_query_view(conn):
     except Exception as e:
         st.error(f"Nested query failed: {e}")
 
+@timed_page
 def aggregate_query_view(conn):
     st.header("Aggregate Query Viewer")
+    org_id = st.session_state.org_id
     st.write("Example: patents with at least two paid renewals.")
     try:
-        df = df_from_query(conn, """
-            SELECT P_ID, COUNT(R_No) AS NumberOfRenewals
-            FROM Renewals
-            WHERE Fee_Status LIKE '%Paid%'
-            GROUP BY P_ID
-            HAVING COUNT(R_No) >= 2
-        """, columns=["P_ID","NumberOfRenewals"])
+        df = patent_db.get_multi_renewal_patents(conn, org_id)
         if df.empty:
             st.info("No patents with >= 2 paid renewals found.")
         else:
-            # join to show titles
-            cur = conn.cursor()
-            cur.execute("SELECT P_ID, Title FROM Patents WHERE P_ID IN (%s)" % ",".join(str(x) for x in df["P_ID"].tolist()))
-            titles = cur.fetchall()
-            titles_map = {t[0]: t[1] for t in titles}
-            df["Title"] = df["P_ID"].map(titles_map)
-            st.dataframe(df[["P_ID","Title","NumberOfRenewals"]], use_container_width=True)
+            st.dataframe(df, use_container_width=True)
     except Exception as e:
         st.error(f"Aggregate query failed: {e}")
 
 
 # Inventor pages: overview, my patents, add patent
 
+@timed_page
 def inventor_overview(conn):
     st.title("Inventor — Overview")
+    org_id = st.session_state.org_id
     if not st.session_state.user_id:
         st.info("No inventor session found.")
         return
     inv_id = st.session_state.user_id
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(DISTINCT IP.P_ID) FROM Inventor_Patents IP WHERE IP.I_ID = %s", (inv_id,))
-        total = cur.fetchone()[0]
+        total = patent_db.count_inventor_patents(conn, org_id, inv_id)
         st.metric("My Patents", total)
     except Exception:
         st.info("Unable to fetch inventor stats.")
 
-    st.markdown("### My Patents (quick view)")
-    inventor_my_patents(conn)
+    st.markdown("### Changes since last visit")
+    # Read once per login and kept for the session, so reruns don't re-query
+    # and the list doesn't vanish after it has been marked seen.
+    if "_inv_changes" not in st.session_state:
+        try:
+            changes = patent_db.get_changes_since_last_visit(conn, inv_id)
+            if not changes.empty:
+                patent_db.mark_changes_seen(conn, inv_id, int(changes["Event_ID"].max()))
+            st.session_state._inv_changes = changes
+        except Exception:
+            st.info("Status change feed not available.")
+            return
+    changes = st.session_state._inv_changes
+    if changes.empty:
+        st.info("No status changes since your last visit.")
+    else:
+        st.dataframe(changes.drop(columns=["Event_ID"]), use_container_width=True)
 
+@timed_page
 def inventor_my_patents(conn):
+    org_id = st.session_state.org_id
     if not st.session_state.user_id:
         st.info("No inventor session.")
         return
     inv_id = st.session_state.user_id
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT P.P_ID, P.Title, P.Status, P.Filing_Date, P.Domain, P.Patent_Type
-        FROM Patents P
-        JOIN Inventor_Patents IP ON P.P_ID = IP.P_ID
-        WHERE IP.I_ID = %s
-        ORDER BY P.Filing_Date DESC
-    """, (inv_id,))
-    rows = cur.fetchall() or []
-    st.dataframe(rows, use_container_width=True)
+    include_archived = st.checkbox("Include archived patents (expired or withdrawn)")
+    st.dataframe(patent_db.get_inventor_patents(conn, org_id, inv_id, include_archived=include_archived),
+                 use_container_width=True)
 
+@timed_page
 def inventor_add_patent(conn):
     st.title("Add New Patent")
+    org_id = st.session_state.org_id
     with st.form("add_patent"):
         title = st.text_input("Title")
         description = st.text_area("Short Description")
         domain = st.text_input("Domain")
-        patent_type = st.selectbox("Patent Type", ["Utility", "Design", "Plant"])
+        patent_type = st.selectbox("Patent Type", patent_db.PATENT_TYPES)
         filing_date = st.date_input("Filing Date", value=date.today())
         appl_name = st.text_input("Applicant Name (Your org/company)")
+        file_anyway = st.checkbox("File even if similar patents exist")
         submitted = st.form_submit_button("Add Patent")
     if not submitted:
         return
     if not title or not description or not domain or not appl_name:
         st.error("Title, Description, Domain and Applicant are required.")
         return
+    if not file_anyway:
+        try:
+            similar = patent_db.find_similar_patents(conn, org_id, title, description)
+        except Exception:
+            similar = pd.DataFrame()
+        if not similar.empty:
+            st.warning("This filing looks like a duplicate of existing patents. Review them, then tick "
+                       "\"File even if similar patents exist\" to submit anyway.")
+            st.dataframe(similar, use_container_width=True, hide_index=True)
+            return
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO Patents (Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (appl_name, filing_date.isoformat(), domain, "Pending", patent_type, title, description))
-        new_p_id = cur.lastrowid
-        cur.execute("INSERT INTO Inventor_Patents (I_ID, P_ID) VALUES (%s, %s)", (st.session_state.user_id, new_p_id))
-        conn.commit()
+        new_p_id = patent_db.add_patent(conn, org_id, st.session_state.user_id, appl_name, filing_date,
+                                        domain, patent_type, title, description)
+        note_write()
         st.success(f"Patent added (P_ID={new_p_id}) and linked to your profile.")
         st.rerun()
     except Exception as e:
@@ -901,46 +1035,33 @@ def inventor_add_patent(conn):
 
 # Reviewer pages: overview, assigned reviews, history
 
+@timed_page
 def reviewer_overview(conn):
     st.title("Reviewer — Overview")
     reviewer_assigned_reviews(conn)
 
+@timed_page
 def reviewer_assigned_reviews(conn):
     if not st.session_state.user_id:
         st.info("No reviewer session.")
         return
     r_id = st.session_state.user_id
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT PR.P_ID, P.Title, PR.Assignment_Date, PR.Review_Status, PR.Review_Date, PR.Decision, PR.Comments
-        FROM Patent_Reviewers PR
-        JOIN Patents P ON PR.P_ID = P.P_ID
-        WHERE PR.R_ID = %s
-        ORDER BY PR.Assignment_Date DESC
-    """, (r_id,))
-    rows = cur.fetchall() or []
+    rows = patent_db.get_reviewer_assignments(conn, r_id)
     st.dataframe(rows, use_container_width=True)
 
-    pending = [r for r in rows if r.get("Review_Status") != "Completed"]
-    if pending:
+    pending = rows[rows["Review_Status"] != "Completed"]
+    if not pending.empty:
         st.markdown("### Perform Review")
-        opts = {f"{p['Title']} (P:{p['P_ID']})": p for p in pending}
-        sel = st.selectbox("Select pending review", list(opts.keys()))
-        rec = opts[sel]
+        p_id = patent_selectbox(pending, label="Select pending review", tag="P")
         with st.form("review_submit"):
             decision = st.selectbox("Decision", ["Approved", "Rejected", "Needs Revision"])
             comments = st.text_area("Comments")
             submit = st.form_submit_button("Submit Review")
         if submit:
             try:
-                cur2 = conn.cursor()
-                cur2.execute("""
-                    UPDATE Patent_Reviewers
-                    SET Review_Status = 'Completed', Decision = %s, Comments = %s, Review_Date = CURDATE()
-                    WHERE P_ID = %s AND R_ID = %s
-                """, (decision, comments, rec['P_ID'], r_id))
-                cur2.execute("UPDATE Patents SET Status=%s WHERE P_ID=%s", (decision, rec['P_ID']))
-                conn.commit()
+                patent_db.submit_review(conn, p_id, r_id, decision, comments)
+                note_write()
+                get_reviewer_index().mark_stale()
                 st.success("Review submitted and patent status updated.")
                 st.rerun()
             except Exception as e:
@@ -948,21 +1069,14 @@ def reviewer_assigned_reviews(conn):
     else:
         st.info("No pending reviews assigned to you.")
 
+@timed_page
 def reviewer_history(conn):
     if not st.session_state.user_id:
         st.info("No reviewer session.")
         return
     r_id = st.session_state.user_id
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT PR.P_ID, P.Title, PR.Assignment_Date, PR.Review_Status, PR.Review_Date, PR.Decision, PR.Comments
-        FROM Patent_Reviewers PR
-        JOIN Patents P ON PR.P_ID = P.P_ID
-        WHERE PR.R_ID = %s
-        ORDER BY PR.Review_Date DESC
-    """, (r_id,))
-    rows = cur.fetchall() or []
-    st.dataframe(rows, use_container_width=True)
+    st.dataframe(patent_db.get_reviewer_assignments(conn, r_id, order_by="Review_Date", include_archived=True),
+                 use_container_width=True)
 
 
 # Logout
@@ -977,16 +1091,22 @@ def logout():
 
 def main():
     st.set_page_config(page_title="Patent Lifecycle Management System", layout="wide")
-    conn = get_db_connection()
-    if not conn:
+    start_metrics_endpoint()
+    router = get_db_router()
+    if not router:
         st.header("Cannot connect to the database — check your DB server and credentials.")
+        export_metrics()
         return
 
-    # Render either guest or logged-in shell
-    if not st.session_state.logged_in:
-        render_guest_shell(conn)
-    else:
-        render_logged_in_shell(conn)
+    # Render either guest or logged-in shell; pooled connections go back on every run
+    try:
+        if not st.session_state.logged_in:
+            render_guest_shell(router)
+        else:
+            render_logged_in_shell(router)
+    finally:
+        router.close()
+        export_metrics()
 
 if __name__ == "__main__":
     main()
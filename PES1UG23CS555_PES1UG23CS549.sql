@@ -2,14 +2,25 @@ CREATE DATABASE IF NOT EXISTS patent_system;
 USE patent_system;
 
 
+-- Table for Organizations (tenants). Tenant-owned tables carry Org_ID as the
+-- leading column of their indexes so each client's queries stay in its own range.
+CREATE TABLE Organizations (
+    Org_ID INT PRIMARY KEY AUTO_INCREMENT,
+    Name VARCHAR(150) NOT NULL UNIQUE
+);
+
 -- Table for Inventors
 CREATE TABLE Inventors (
     I_ID INT PRIMARY KEY AUTO_INCREMENT,
+    Org_ID INT NOT NULL,
     Name VARCHAR(20) NOT NULL,
     Organization VARCHAR(150),
     Email VARCHAR(50) UNIQUE,
     Phone_No VARCHAR(50),
-    Password VARCHAR(30) NOT NULL
+    Password VARCHAR(30) NOT NULL,
+    Last_Seen_Event BIGINT NOT NULL DEFAULT 0,
+    INDEX idx_inventors_org (Org_ID, Name),
+    FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID)
 );
 
 -- Table for Reviewers 
@@ -28,6 +39,7 @@ CREATE TABLE Reviewers (
 -- Table for Patents
 CREATE TABLE Patents (
     P_ID INT PRIMARY KEY AUTO_INCREMENT,
+    Org_ID INT NOT NULL,
     Appl_Name VARCHAR(30) NOT NULL,
     Filing_Date DATE NOT NULL,
     Domain VARCHAR(30),
@@ -36,7 +48,12 @@ CREATE TABLE Patents (
     Title VARCHAR(100) NOT NULL,
     Description TEXT NOT NULL,
     All_Reviews_Complete BOOLEAN DEFAULT FALSE,
-    Final_Review_Date DATE DEFAULT NULL
+    Final_Review_Date DATE DEFAULT NULL,
+    INDEX idx_patents_org_status (Org_ID, Status),
+    INDEX idx_patents_org_domain (Org_ID, Domain),
+    INDEX idx_patents_org_type (Org_ID, Patent_Type),
+    INDEX idx_patents_org_title (Org_ID, Title),
+    FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID)
 );
 
 -- Table for Costs
@@ -53,11 +70,14 @@ CREATE TABLE Costs (
 -- Table for Renewals
 CREATE TABLE Renewals (
     R_No INT PRIMARY KEY AUTO_INCREMENT,
+    Org_ID INT NOT NULL,
     P_ID INT,
     R_Date DATE,
     Fee_Status VARCHAR(20),
     Expiry_Date DATE NOT NULL,
-    FOREIGN KEY (P_ID) REFERENCES Patents(P_ID)
+    INDEX idx_renewals_org_expiry (Org_ID, Expiry_Date),
+    FOREIGN KEY (P_ID) REFERENCES Patents(P_ID),
+    FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID)
 );
 
 -- Patent_Reviewers
@@ -71,6 +91,8 @@ CREATE TABLE Patent_Reviewers (
     Decision VARCHAR(100),
     Comments TEXT,
     PRIMARY KEY (P_ID, R_ID),
+    -- Incremental refresh of the reviewer expertise index reads recent completions
+    INDEX idx_reviews_status_date (Review_Status, Review_Date),
     FOREIGN KEY (P_ID) REFERENCES Patents(P_ID) ON DELETE CASCADE,
     FOREIGN KEY (R_ID) REFERENCES Reviewers(R_ID) ON DELETE NO ACTION
 );
@@ -100,18 +122,25 @@ CREATE TABLE Inventor_Patents (
 -- Patents_Opposition 
 CREATE TABLE Patents_Opposition (
     O_ID INT PRIMARY KEY AUTO_INCREMENT,
+    Org_ID INT NOT NULL,
     Email VARCHAR(50) NOT NULL,
     Patent_Title VARCHAR(50) NOT NULL,
     O_Date DATE NOT NULL,
-    Reason TEXT
+    Reason TEXT,
+    INDEX idx_opposition_org_date (Org_ID, O_Date),
+    FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID)
 );
 
 
 -- Sample data insertion
 
-INSERT INTO Inventors (Name, Organization, Email, Phone_No, Password) VALUES
-('Dr. Evelyn Reed', 'Quantum Innovations Inc.', 'e.reed@qii.com', '555-0101', 'inv123'),
-('Ben Carter', 'BioGen Labs', 'b.carter@biogen.com', '555-0102', 'inv123');
+INSERT INTO Organizations (Name) VALUES
+('Quantum Innovations Inc.'),
+('BioGen Labs');
+
+INSERT INTO Inventors (Org_ID, Name, Organization, Email, Phone_No, Password) VALUES
+(1, 'Dr. Evelyn Reed', 'Quantum Innovations Inc.', 'e.reed@qii.com', '555-0101', 'inv123'),
+(2, 'Ben Carter', 'BioGen Labs', 'b.carter@biogen.com', '555-0102', 'inv123');
 
 -- Corrected reviewers insertion 
 INSERT INTO Reviewers (Email, Name, Designation, Organisation, Comment, Password, Is_Active) VALUES
@@ -119,9 +148,9 @@ INSERT INTO Reviewers (Email, Name, Designation, Organisation, Comment, Password
 ('ellie@yyy.com', 'Dr. Ellie Sattler', 'Specialist Examiner', 'Global Patent Office', 'Biotech specialist', 'rev123', TRUE);
 
 -- Patents
-INSERT INTO Patents (Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description, All_Reviews_Complete) VALUES
-('Quantum Innovations Inc.', '2024-01-15', 'Quantum Computing', 'Under Review', 'Utility', 'Quantum Entanglement Communication System', 'Revolutionary quantum communication method', FALSE),
-('BioGen Labs', '2024-03-22', 'Biotechnology', 'Granted', 'Utility', 'CRISPR-Based Gene Therapy for Neurological Disorders', 'Novel gene therapy approach', TRUE);
+INSERT INTO Patents (Org_ID, Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description, All_Reviews_Complete) VALUES
+(1, 'Quantum Innovations Inc.', '2024-01-15', 'Quantum Computing', 'Under Review', 'Utility', 'Quantum Entanglement Communication System', 'Revolutionary quantum communication method', FALSE),
+(2, 'BioGen Labs', '2024-03-22', 'Biotechnology', 'Granted', 'Utility', 'CRISPR-Based Gene Therapy for Neurological Disorders', 'Novel gene therapy approach', TRUE);
 
 -- Costs
 INSERT INTO Costs (P_ID, Cost_Type, Amount, Date_Paid) VALUES
@@ -129,10 +158,10 @@ INSERT INTO Costs (P_ID, Cost_Type, Amount, Date_Paid) VALUES
 (2, 'Issue Fee', 2000.00, '2025-01-20');
 
 -- Renewals 
-INSERT INTO Renewals (P_ID, R_Date, Fee_Status, Expiry_Date) VALUES
-(2, '2029-01-15', 'First Renewal Paid', '2033-01-15'),
-(2, '2033-01-10', 'Second Renewal Paid', '2037-01-15'),
-(1, '2029-02-01', 'First Renewal Pending', '2033-02-01');
+INSERT INTO Renewals (Org_ID, P_ID, R_Date, Fee_Status, Expiry_Date) VALUES
+(2, 2, '2029-01-15', 'First Renewal Paid', '2033-01-15'),
+(2, 2, '2033-01-10', 'Second Renewal Paid', '2037-01-15'),
+(1, 1, '2029-02-01', 'First Renewal Pending', '2033-02-01');
 
 -- Patent_Reviewers 
 INSERT INTO Patent_Reviewers (P_ID, R_ID, Reviewer_Name, Assignment_Date, Review_Date, Review_Status, Decision, Comments) VALUES
@@ -155,9 +184,9 @@ INSERT INTO Inventor_Patents (I_ID, P_ID) VALUES
 (2, 2);
 
 -- Oppositions
-INSERT INTO Patents_Opposition (Email, Patent_Title, O_Date, Reason) VALUES
-('john.doe@email.com', 'Quantum Entanglement Communication System', '2025-05-20', 'Prior art exists from a 2022 paper.'),
-('jane.smith@email.com', 'Quantum Entanglement Communication System', '2025-06-01', 'The invention is considered obvious.');
+INSERT INTO Patents_Opposition (Org_ID, Email, Patent_Title, O_Date, Reason) VALUES
+(1, 'john.doe@email.com', 'Quantum Entanglement Communication System', '2025-05-20', 'Prior art exists from a 2022 paper.'),
+(1, 'jane.smith@email.com', 'Quantum Entanglement Communication System', '2025-06-01', 'The invention is considered obvious.');
 
 
 -- Single Trigger, Function, Procedure
@@ -171,6 +200,161 @@ CREATE TABLE IF NOT EXISTS Patent_Status_Audit (
     Changed_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Outbox of status changes for notifications. Rows are written by the trigger,
+-- so they commit or roll back with the status change itself; the dispatcher
+-- (jobs.py dispatch-outbox) sets Dispatched_At once sinks have accepted them.
+CREATE TABLE IF NOT EXISTS Status_Change_Outbox (
+    Event_ID BIGINT PRIMARY KEY AUTO_INCREMENT,
+    P_ID INT NOT NULL,
+    Old_Status VARCHAR(50),
+    New_Status VARCHAR(50),
+    Changed_By VARCHAR(50),
+    Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    Dispatched_At TIMESTAMP NULL DEFAULT NULL,
+    Attempts INT NOT NULL DEFAULT 0,
+    INDEX idx_outbox_pending (Dispatched_At, Event_ID),
+    INDEX idx_outbox_patent (P_ID, Event_ID)
+);
+
+-- Daily portfolio aggregates written by the nightly snapshot job
+-- (jobs.py snapshot). Metric is status/domain/type/pending_reviews/renewals_due
+-- and Dim the value counted ('' for a single total). The key leads with
+-- (Org_ID, Metric, Snap_Date) so a multi-year trend is one short range scan.
+CREATE TABLE IF NOT EXISTS Portfolio_Snapshots (
+    Org_ID INT NOT NULL,
+    Metric VARCHAR(30) NOT NULL,
+    Snap_Date DATE NOT NULL,
+    Dim VARCHAR(100) NOT NULL DEFAULT '',
+    Value INT NOT NULL,
+    PRIMARY KEY (Org_ID, Metric, Snap_Date, Dim),
+    FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID)
+);
+
+-- Near-duplicate detection (dedup.py). Each patent's Title + Description is
+-- kept as a MinHash signature plus one LSH bucket per band; filings that share
+-- a bucket are candidates. Text_CRC is CRC32(CONCAT_WS(' ', Title, Description))
+-- so the nightly scan re-indexes edited patents.
+CREATE TABLE IF NOT EXISTS Patent_Signatures (
+    P_ID INT PRIMARY KEY,
+    Org_ID INT NOT NULL,
+    Text_CRC INT UNSIGNED NOT NULL,
+    Signature VARBINARY(400) NOT NULL,
+    FOREIGN KEY (P_ID) REFERENCES Patents(P_ID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Patent_LSH_Buckets (
+    Org_ID INT NOT NULL,
+    Band TINYINT UNSIGNED NOT NULL,
+    Bucket BIGINT NOT NULL,
+    P_ID INT NOT NULL,
+    PRIMARY KEY (Org_ID, Band, Bucket, P_ID),
+    INDEX idx_lsh_patent (P_ID),
+    FOREIGN KEY (P_ID) REFERENCES Patents(P_ID) ON DELETE CASCADE
+);
+
+-- Output of the nightly clustering scan (jobs.py dedup-scan); Cluster_ID is
+-- the lowest P_ID in the cluster.
+CREATE TABLE IF NOT EXISTS Patent_Duplicate_Clusters (
+    P_ID INT PRIMARY KEY,
+    Org_ID INT NOT NULL,
+    Cluster_ID INT NOT NULL,
+    Similarity DECIMAL(4,3) NOT NULL,
+    Scanned_At DATETIME NOT NULL,
+    INDEX idx_clusters_org (Org_ID, Cluster_ID),
+    FOREIGN KEY (P_ID) REFERENCES Patents(P_ID) ON DELETE CASCADE
+);
+
+-- Archive tier (jobs.py archive). Expired and withdrawn patents move here with
+-- their child rows so the live tables every page scans stay small. Columns
+-- mirror the live tables in the same order (Patents_Archive adds Archived_At)
+-- and rows keep their original IDs. Reviewers are soft-deleted instead
+-- (Is_Active / Deleted_Date), so archived review history keeps its reviewer.
+CREATE TABLE IF NOT EXISTS Patents_Archive (
+    P_ID INT PRIMARY KEY,
+    Org_ID INT NOT NULL,
+    Appl_Name VARCHAR(30) NOT NULL,
+    Filing_Date DATE NOT NULL,
+    Domain VARCHAR(30),
+    Status VARCHAR(50) NOT NULL,
+    Patent_Type ENUM('Utility','Design','Plant') NOT NULL,
+    Title VARCHAR(100) NOT NULL,
+    Description TEXT NOT NULL,
+    All_Reviews_Complete BOOLEAN,
+    Final_Review_Date DATE,
+    Archived_At DATETIME NOT NULL,
+    INDEX idx_patents_archive_org_status (Org_ID, Status),
+    INDEX idx_patents_archive_org_title (Org_ID, Title)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Costs_Archive (
+    Cost_ID INT PRIMARY KEY,
+    P_ID INT,
+    Cost_Type VARCHAR(20),
+    Amount DECIMAL(10, 2) NOT NULL,
+    Date_Paid DATE,
+    INDEX idx_costs_archive_patent (P_ID)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Renewals_Archive (
+    R_No INT PRIMARY KEY,
+    Org_ID INT NOT NULL,
+    P_ID INT,
+    R_Date DATE,
+    Fee_Status VARCHAR(20),
+    Expiry_Date DATE NOT NULL,
+    INDEX idx_renewals_archive_patent (P_ID)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Patent_Reviewers_Archive (
+    P_ID INT,
+    R_ID INT,
+    Reviewer_Name VARCHAR(20) NOT NULL,
+    Assignment_Date DATE,
+    Review_Date DATE,
+    Review_Status VARCHAR(50),
+    Decision VARCHAR(100),
+    Comments TEXT,
+    PRIMARY KEY (P_ID, R_ID),
+    INDEX idx_reviewers_archive_reviewer (R_ID),
+    INDEX idx_reviewers_archive_status_date (Review_Status, Review_Date)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Patent_Stages_Archive (
+    P_ID INT,
+    Stage_Name VARCHAR(100),
+    Stage_Date DATE,
+    Stage_Status VARCHAR(50),
+    Review_Complete BOOLEAN,
+    Completed_By VARCHAR(100),
+    Completion_Date DATE,
+    PRIMARY KEY (P_ID, Stage_Name)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Inventor_Patents_Archive (
+    I_ID INT,
+    P_ID INT,
+    PRIMARY KEY (I_ID, P_ID),
+    INDEX idx_inventor_patents_archive_patent (P_ID)
+) ROW_FORMAT=COMPRESSED;
+
+-- "Include archived" read path: live and archived rows behind one name.
+CREATE OR REPLACE VIEW All_Patents AS
+    SELECT P_ID, Org_ID, Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description, FALSE AS Archived
+    FROM Patents
+    UNION ALL
+    SELECT P_ID, Org_ID, Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description, TRUE
+    FROM Patents_Archive;
+
+CREATE OR REPLACE VIEW All_Inventor_Patents AS
+    SELECT I_ID, P_ID FROM Inventor_Patents
+    UNION ALL
+    SELECT I_ID, P_ID FROM Inventor_Patents_Archive;
+
+CREATE OR REPLACE VIEW All_Patent_Reviewers AS
+    SELECT * FROM Patent_Reviewers
+    UNION ALL
+    SELECT * FROM Patent_Reviewers_Archive;
+
 DELIMITER $$
 CREATE TRIGGER after_patent_status_update
 AFTER UPDATE ON Patents
@@ -179,6 +363,8 @@ BEGIN
     IF OLD.Status <> NEW.Status THEN
         INSERT INTO Patent_Status_Audit (P_ID, Old_Status, New_Status, Changed_By)
         VALUES (OLD.P_ID, OLD.Status, NEW.Status, USER());
+        INSERT INTO Status_Change_Outbox (P_ID, Old_Status, New_Status, Changed_By)
+        VALUES (OLD.P_ID, OLD.Status, NEW.Status, USER());
     END IF;
 END$$
 DELIMITER ;
@@ -195,13 +381,13 @@ BEGIN
 END$$
 DELIMITER ;
 
--- Procedure: Get patents by domain
+-- Procedure: Get patents by domain (within one organization)
 DELIMITER $$
-CREATE PROCEDURE GetPatentsByDomain(IN domain_name VARCHAR(100))
+CREATE PROCEDURE GetPatentsByDomain(IN p_org_id INT, IN p_domain VARCHAR(100))
 BEGIN
     SELECT P_ID, Title, Appl_Name, Filing_Date, Status, All_Reviews_Complete
     FROM Patents
-    WHERE Domain = domain_name
+    WHERE Org_ID = p_org_id AND Domain = p_domain
     ORDER BY Filing_Date DESC;
 END$$
 DELIMITER ;
@@ -0,0 +1,85 @@
+"""Per-filing duplicate check latency against an in-memory LSH index of N patents.
+
+Builds MinHash signatures and band buckets for N synthetic patents in memory
+(the same layout patent_db stores in Patent_Signatures / Patent_LSH_Buckets),
+then times the Python side of each new filing's check: signature, candidate
+ranking by shared bands (capped like find_similar_patents) and confirmation.
+Half of the probes are near-copies of indexed patents. The target is under
+100 ms at 1M patents.
+
+The bucket query itself is not timed: dict lookups stand in for it, so the
+result says nothing about MySQL latency. find_similar_patents adds one query
+of BANDS index range probes plus the signature fetch for the candidates.
+
+    python benchmarks/dedup_lookup.py --rows 1000000
+"""
+import argparse
+import collections
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dedup  # noqa: E402
+from patent_db import MAX_DUPLICATE_CANDIDATES  # noqa: E402
+
+WORDS = ("quantum entanglement gene therapy vector robotic actuator battery electrode polymer coating "
+         "neural network sensor array wireless protocol catalyst membrane optical fiber laser cavity "
+         "semiconductor wafer lithography vaccine antibody enzyme turbine blade composite alloy").split()
+
+
+def make_text(rng, i):
+    title = " ".join(rng.choice(WORDS) for _ in range(6)) + f" {i}"
+    description = " ".join(rng.choice(WORDS) for _ in range(30))
+    return title, description
+
+
+def near_copy(rng, title, description):
+    words = description.split()
+    for _ in range(3):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return title + " improved", " ".join(words)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--probes", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    texts, signatures, buckets = [], [], {}
+    start = time.perf_counter()
+    for p_id in range(args.rows):
+        title, description = make_text(rng, p_id)
+        sig = dedup.signature(dedup.document(title, description))
+        signatures.append(sig)
+        if p_id < args.probes:
+            texts.append((title, description))
+        for key in dedup.band_keys(sig):
+            buckets.setdefault(key, []).append(p_id)
+    print(f"indexed {args.rows:,} patents in {time.perf_counter() - start:.1f}s")
+
+    latencies, flagged = [], 0
+    for i in range(args.probes):
+        title, description = near_copy(rng, *texts[i]) if i % 2 == 0 else make_text(rng, args.rows + i)
+        start = time.perf_counter()
+        sig = dedup.signature(dedup.document(title, description))
+        shared = collections.Counter(p for key in dedup.band_keys(sig) for p in buckets.get(key, ()))
+        candidates = [p for p, _ in shared.most_common(MAX_DUPLICATE_CANDIDATES)]
+        hits = [p for p in candidates if dedup.similarity(sig, signatures[p]) >= dedup.DUPLICATE_THRESHOLD]
+        latencies.append((time.perf_counter() - start) * 1000)
+        flagged += i % 2 == 0 and i in hits
+
+    latencies.sort()
+    print(f"near-copies flagged: {flagged}/{(args.probes + 1) // 2}")
+    print(f"per filing: p50 {statistics.median(latencies):.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms (target < 100 ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Portfolio-wide age/deadline computation: vectorized engine vs a per-row loop.
+
+Generates synthetic (P_ID, epoch day, type code, live) integer rows shaped
+like patent_db.get_filing_columns' cursor result, then times the decode into
+column arrays and, separately, the age histogram, statutory expiry and one
+quarter's maintenance-window report. The target is the whole pass (decode
+plus compute) over 1M patents in under a second. Before timing, both paths
+run on the loop sample and must produce the same histogram and report rows.
+
+    python benchmarks/lifecycle_vectorized.py --rows 1000000
+"""
+import argparse
+import calendar
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lifecycle  # noqa: E402
+import patent_db  # noqa: E402
+
+EPOCH = date(1970, 1, 1)
+TYPE_CODES = [1] * 8 + [2, 3]  # 1-based into patent_db.PATENT_TYPES
+
+
+def make_rows(n, rng):
+    first = (date(2000, 1, 1) - EPOCH).days
+    return [(i, first + rng.randrange(9500), rng.choice(TYPE_CODES), int(rng.random() > 0.1)) for i in range(1, n + 1)]
+
+
+def vectorized(cols, today, q_start, q_end):
+    ages = lifecycle.age_distribution(cols.Filing_Date, today)
+    lifecycle.statutory_expiry(cols.Filing_Date, cols.Patent_Type)
+    report = lifecycle.maintenance_window_report(cols.P_ID, cols.Filing_Date, cols.Patent_Type,
+                                                 q_start, q_end, live=cols.Live)
+    return ages, report
+
+
+def _add_months(d, months):
+    m = d.month - 1 + months
+    year, month = d.year + m // 12, m % 12 + 1
+    return date(year, month, min(d.day, calendar.monthrange(year, month)[1]))
+
+
+def per_row(rows, today, q_start, q_end):
+    """The age_calculator_ui arithmetic applied one patent at a time."""
+    hist, due_rows = {}, []
+    for p_id, day, type_code, live in rows:
+        filing = EPOCH + timedelta(days=day)
+        patent_type = patent_db.PATENT_TYPES[type_code - 1]
+        months = (today.year - filing.year) * 12 + today.month - filing.month - (today.day < filing.day)
+        if months >= 0:
+            hist[months // 12] = hist.get(months // 12, 0) + 1
+        expiry = _add_months(filing, 12 * lifecycle.TERM_YEARS.get(patent_type, lifecycle.DEFAULT_TERM_YEARS))
+        if not live or patent_type in lifecycle.NO_MAINTENANCE_TYPES:
+            continue
+        for fee_year in lifecycle.MAINTENANCE_YEARS:
+            due = _add_months(filing, 12 * fee_year)
+            opens = _add_months(due, -lifecycle.WINDOW_MONTHS)
+            if opens < q_end and due >= q_start and due <= expiry:
+                due_rows.append((p_id, fee_year, due))
+    return hist, due_rows
+
+
+def check_same(rows, today, q_start, q_end):
+    ages, report = vectorized(patent_db.filing_columns(rows), today, q_start, q_end)
+    hist, due_rows = per_row(rows, today, q_start, q_end)
+    got_hist = {int(a): int(n) for a, n in zip(ages["Age_Years"], ages["Patents"]) if n}
+    assert got_hist == hist, "age histograms differ"
+    got_rows = [(int(p), int(y), d.item()) for p, y, d in
+                zip(report["P_ID"], report["Fee_Year"], report["Due_Date"].to_numpy(dtype="datetime64[D]"))]
+    assert got_rows == sorted(due_rows, key=lambda r: (r[2], r[0])), "maintenance reports differ"
+    return len(got_rows)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--loop-rows", type=int, default=100_000, help="rows for the per-row baseline (extrapolated)")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = make_rows(args.rows, rng)
+    today = date.today()
+    q_start = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+    q_end = lifecycle.add_months([q_start], 3)[0].item()
+
+    sample = rows[:args.loop_rows]
+    checked = check_same(sample, today, q_start, q_end)
+
+    start = time.perf_counter()
+    cols = patent_db.filing_columns(rows)
+    decode = time.perf_counter() - start
+    start = time.perf_counter()
+    ages, report = vectorized(cols, today, q_start, q_end)
+    compute = time.perf_counter() - start
+    vec = decode + compute
+
+    start = time.perf_counter()
+    per_row(sample, today, q_start, q_end)
+    loop = (time.perf_counter() - start) * len(rows) / max(len(sample), 1)
+
+    print(f"patents:              {len(rows):>12,}")
+    print(f"fees due this quarter:{len(report):>12,}")
+    print(f"matches per-row loop: {len(sample):>12,} rows, {checked:,} fee rows")
+    print(f"decode (tuples):      {decode:>11.3f}s")
+    print(f"compute:              {compute:>11.3f}s")
+    print(f"vectorized total:     {vec:>11.3f}s {'(within 1s target)' if vec < 1 else '(OVER 1s target)'}")
+    print(f"per-row loop (est.):  {loop:>11.3f}s  x{loop / vec:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""SQL statements per admin-overview interaction, full-page reruns vs fragments.
+
+Drives the real Admin Overview with Streamlit's AppTest against the fixture
+database from page_budgets.py: it loads the page, then changes each widget in
+turn, once with PATENT_FRAGMENTS=0 (every change reruns the whole page) and
+once with fragments on (a change reruns only the section holding the widget).
+Each interaction is measured with a warm cache and again right after a write
+has cleared it.
+
+AppTest always reruns the whole script, so with fragments on an interaction's
+cost is read from patent_page_db_statements for the widget's section, which
+is what a fragment-only rerun executes. With fragments off it is every
+statement the rerun issued. Grid edits are not covered: AppTest cannot drive
+st.data_editor.
+
+    python benchmarks/page_budgets.py seed
+    python benchmarks/overview_queries.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+import patent_db  # noqa: E402
+from page_budgets import APP, fixture_sessions  # noqa: E402
+
+DELETE_MENU = "Select what you want to delete:"
+
+# (interaction, fragment holding the widget, change to apply), in page order.
+INTERACTIONS = [
+    ("change trend metric", "overview_trends",
+     lambda at: at.selectbox(key="trend_metric").set_value(list(patent_db.SNAPSHOT_METRICS)[1])),
+    ("change trend range", "overview_trends",
+     lambda at: at.selectbox(key="trend_years").set_value(3)),
+    ("change maintenance quarter", "overview_maintenance",
+     lambda at: at.selectbox(key="maint_quarter").set_value("Next quarter")),
+    ("open bulk delete", "overview_delete_operations",
+     lambda at: next(s for s in at.selectbox if s.label == DELETE_MENU).set_value("Bulk Delete Patents (by filter)")),
+    ("pick a bulk-delete status", "overview_delete_operations",
+     lambda at: at.multiselect(key="bulk_statuses").set_value(["Withdrawn"])),
+]
+
+
+def rerun(at, section, fragments):
+    """Run the app once; returns the statements a real rerun of this kind would issue."""
+    total = metrics.DB_QUERY_SECONDS.count()
+    in_section = metrics.PAGE_DB_STATEMENTS.sum(role="Admin", page=section)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    if fragments:
+        return int(metrics.PAGE_DB_STATEMENTS.sum(role="Admin", page=section) - in_section)
+    return metrics.DB_QUERY_SECONDS.count() - total
+
+
+def measure(session, fragments):
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["PATENT_FRAGMENTS"] = "1" if fragments else "0"
+    at = AppTest.from_file(APP, default_timeout=120)
+    for key, value in session.items():
+        at.session_state[key] = value
+    patent_db.clear_cache()
+    results = {"load the page (cold cache)": (rerun(at, None, False), None)}
+    for name, section, change in INTERACTIONS:
+        change(at)
+        warm = rerun(at, section, fragments)
+        patent_db.clear_cache()  # what a committed write does
+        results[name] = (warm, rerun(at, section, fragments))
+    return results
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+
+    conn = patent_db.connect()
+    try:
+        session = fixture_sessions(conn)["Admin"]
+    finally:
+        conn.close()
+    full = measure(session, fragments=False)
+    frag = measure(session, fragments=True)
+
+    def cell(n):
+        return "-" if n is None else str(n)
+
+    print(f"{'':<30}{'full-page rerun':>28}{'fragment rerun':>28}")
+    print(f"{'interaction':<30}{'warm':>14}{'after write':>14}{'warm':>14}{'after write':>14}")
+    for name in full:
+        (fw, fa), (gw, ga) = full[name], frag[name]
+        print(f"{name:<30}{cell(fw):>14}{cell(fa):>14}{cell(gw):>14}{cell(ga):>14}")
+    print("(SQL statements per interaction; grid edits are not covered by AppTest)")
+
+
+if __name__ == "__main__":
+    main()
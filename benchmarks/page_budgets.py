@@ -0,0 +1,267 @@
+"""Per-page performance budgets: SQL statements, rows fetched and wall time.
+
+Renders every page with Streamlit's AppTest against a local MySQL database
+seeded with deterministic fixtures. Each page's numbers are compared with the
+committed baseline (benchmarks/page_baseline.json), and the check fails when
+a page exceeds its budget by more than the configured margin.
+
+    mysql -e "CREATE DATABASE patent_perf"
+    mysql patent_perf < PES1UG23CS555_PES1UG23CS549.sql
+    export PATENT_DB_NAME=patent_perf
+    python benchmarks/page_budgets.py seed            # once per database
+    python benchmarks/page_budgets.py record          # after an intended change
+    python benchmarks/page_budgets.py check           # exits 1 on a regression
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import metrics  # noqa: E402
+import patent_db  # noqa: E402
+import reviewer_index  # noqa: E402
+
+APP = os.path.join(ROOT, "PES1UG23CS555_PES1UG23CS549.py")
+BASELINE = os.path.join(ROOT, "benchmarks", "page_baseline.json")
+
+DOMAINS = ["Quantum Computing", "Biotechnology", "Robotics", "Energy", "Materials", "Software"]
+REVIEW_STATUSES = ["Assigned", "In Progress", "Completed"]
+FIXTURE_ORG = "Perf Org 0"
+FIXTURE_INVENTOR = "perf.inventor0@example.com"
+FIXTURE_REVIEWER = "perf.reviewer0@example.com"
+
+# (page, session role, sidebar radio choice, extra session state selecting the page)
+PAGES = [
+    ("guest/home", None, "Home", {}),
+    ("guest/public_stats", None, "Public Stats", {}),
+    ("guest/register_inventor", None, None, {"show_inv_register": True}),
+    ("guest/register_reviewer", None, None, {"show_rev_register": True}),
+    ("guest/file_opposition", None, None, {"show_opposition": True}),
+    ("guest/login", None, None, {"show_login": True}),
+    ("guest/age_calc", None, None, {"_guest_page": "age_calc"}),
+    ("guest/domain_proc", None, None, {"_guest_page": "domain_proc"}),
+    ("guest/join_view", None, None, {"_guest_page": "join_view"}),
+    ("guest/nested_view", None, None, {"_guest_page": "nested_view"}),
+    ("guest/agg_view", None, None, {"_guest_page": "agg_view"}),
+    ("admin/overview", "Admin", "Overview", {}),
+    ("admin/assign_reviewers", "Admin", "Assign Reviewers", {}),
+    ("admin/update_status", "Admin", "Update Patent Status", {}),
+    ("inventor/overview", "Inventor", "Inventor Overview", {}),
+    ("inventor/my_patents", "Inventor", "My Patents", {}),
+    ("inventor/add_patent", "Inventor", "Add New Patent", {}),
+    ("inventor/age_calc", "Inventor", "Patent Age Calculator", {}),
+    ("reviewer/overview", "Reviewer", "Reviewer Overview", {}),
+    ("reviewer/assigned_reviews", "Reviewer", "Assigned Reviews", {}),
+    ("reviewer/history", "Reviewer", "Review History", {}),
+]
+
+
+# Fixtures
+
+def seed(conn, orgs, patents_per_org, seed_value):
+    """Insert a deterministic dataset; does nothing if it is already there."""
+    if patent_db._scalar(conn, "SELECT COUNT(*) FROM Organizations WHERE Name=%s", (FIXTURE_ORG,)):
+        print("Fixtures already present; nothing to do.")
+        return
+    rng = random.Random(seed_value)
+    with patent_db.transaction(conn) as cur:
+        cur.executemany("INSERT INTO Reviewers (Email, Name, Designation, Organisation, Comment, Password, Is_Active) "
+                        "VALUES (%s,%s,%s,%s,%s,%s,TRUE)",
+                        [(f"perf.reviewer{i}@example.com", f"Reviewer {i}", "Examiner", "Perf Office",
+                          f"{DOMAINS[i % len(DOMAINS)]} specialist", "perf") for i in range(20)])
+        cur.execute("SELECT R_ID FROM Reviewers WHERE Email LIKE %s ORDER BY R_ID", ("perf.reviewer%",))
+        reviewer_ids = [r[0] for r in cur.fetchall()]
+
+    for o in range(orgs):
+        org_id = patent_db.get_or_create_organization(conn, f"Perf Org {o}")
+        with patent_db.transaction(conn, org_id) as cur:
+            cur.executemany("INSERT INTO Inventors (Org_ID, Name, Organization, Email, Phone_No, Password) "
+                            "VALUES (%s,%s,%s,%s,%s,%s)",
+                            [(org_id, f"Inventor {o}-{i}", f"Perf Org {o}", f"perf.inventor{o * 50 + i}@example.com",
+                              "555-0000", "perf") for i in range(50)])
+            cur.execute("SELECT I_ID FROM Inventors WHERE Org_ID=%s ORDER BY I_ID", (org_id,))
+            inventor_ids = [r[0] for r in cur.fetchall()]
+
+        for start in range(0, patents_per_org, 500):
+            with patent_db.transaction(conn, org_id) as cur:
+                for n in range(start, min(start + 500, patents_per_org)):
+                    filed = date(2005, 1, 1) + timedelta(days=rng.randrange(7000))
+                    cur.execute("""
+                        INSERT INTO Patents (Org_ID, Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    """, (org_id, f"Perf Org {o}", filed, rng.choice(DOMAINS), rng.choice(patent_db.PATENT_STATUSES),
+                          rng.choice(patent_db.PATENT_TYPES), f"Perf patent {o}-{n}", "Fixture description " * 5))
+                    p_id = cur.lastrowid
+                    cur.execute("INSERT INTO Inventor_Patents (I_ID, P_ID) VALUES (%s, %s)", (rng.choice(inventor_ids), p_id))
+                    if rng.random() < 0.6:
+                        r_id = rng.choice(reviewer_ids)
+                        status = rng.choice(REVIEW_STATUSES)
+                        cur.execute("""
+                            INSERT INTO Patent_Reviewers (P_ID, R_ID, Reviewer_Name, Assignment_Date, Review_Date, Review_Status, Decision)
+                            VALUES (%s, %s, (SELECT Name FROM Reviewers WHERE R_ID=%s), %s, %s, %s, %s)
+                        """, (p_id, r_id, r_id, filed + timedelta(days=30),
+                              filed + timedelta(days=120) if status == "Completed" else None, status,
+                              "Approved" if status == "Completed" else None))
+                    if rng.random() < 0.3:
+                        cur.execute("INSERT INTO Renewals (Org_ID, P_ID, R_Date, Fee_Status, Expiry_Date) VALUES (%s,%s,%s,%s,%s)",
+                                    (org_id, p_id, filed + timedelta(days=1460), "First Renewal Paid",
+                                     filed + timedelta(days=2920)))
+        with patent_db.transaction(conn, org_id) as cur:
+            cur.executemany("INSERT INTO Patents_Opposition (Org_ID, Email, Patent_Title, O_Date, Reason) VALUES (%s,%s,%s,%s,%s)",
+                            [(org_id, f"public{i}@example.com", f"Perf patent {o}-{i}",
+                              date(2024, 1, 1) + timedelta(days=i), "Prior art") for i in range(100)])
+    patent_db.take_snapshot(conn, date.today())
+    print(f"Seeded {orgs} organization(s) x {patents_per_org} patents.")
+
+
+# Measurement
+
+def fixture_sessions(conn):
+    org_id = patent_db._scalar(conn, "SELECT Org_ID FROM Organizations WHERE Name=%s", (FIXTURE_ORG,))
+    if org_id is None:
+        raise SystemExit("No fixtures found; run `page_budgets.py seed` first.")
+    inv_id = patent_db._scalar(conn, "SELECT I_ID FROM Inventors WHERE Email=%s", (FIXTURE_INVENTOR,))
+    r_id = patent_db._scalar(conn, "SELECT R_ID FROM Reviewers WHERE Email=%s", (FIXTURE_REVIEWER,))
+    return {
+        None: {"org_id": org_id},
+        "Admin": {"logged_in": True, "role": "Admin", "user_id": 0, "username": "admin", "org_id": org_id},
+        "Inventor": {"logged_in": True, "role": "Inventor", "user_id": inv_id, "username": "perf", "org_id": org_id},
+        "Reviewer": {"logged_in": True, "role": "Reviewer", "user_id": r_id, "username": "perf", "org_id": org_id},
+    }
+
+
+def measure_page(session, radio, state, repeat):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    for key, value in {**session, **state}.items():
+        at.session_state[key] = value
+    at.run()  # warm pools and process-wide resources; the page is selected below
+    if radio:
+        at.sidebar.radio[0].set_value(radio)
+
+    statements, rows, times = [], [], []
+    for _ in range(repeat):
+        # Every measured run starts from a cold data cache and includes a
+        # reviewer-index refresh, so repeats are alike and budgets cover both.
+        patent_db.clear_cache()
+        reviewer_index.mark_all_stale()
+        q0, r0 = metrics.DB_QUERY_SECONDS.count(), metrics.DB_ROWS_FETCHED.total()
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+        statements.append(metrics.DB_QUERY_SECONDS.count() - q0)
+        rows.append(metrics.DB_ROWS_FETCHED.total() - r0)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return {"statements": int(statistics.median(statements)), "rows": int(statistics.median(rows)),
+            "seconds": round(statistics.median(times), 4)}
+
+
+def measure_all(repeat, only=None):
+    conn = patent_db.connect()
+    try:
+        sessions = fixture_sessions(conn)
+    finally:
+        conn.close()
+    results = {}
+    for name, role, radio, state in PAGES:
+        if only and name not in only:
+            continue
+        results[name] = measure_page(sessions[role], radio, state, repeat)
+    return results
+
+
+# Baseline
+
+def load_baseline():
+    with open(BASELINE) as f:
+        return json.load(f)
+
+
+def over_budget(value, budget, margin):
+    return value > budget * (1 + margin)
+
+
+def check(results, baseline, margin, time_margin, only=None):
+    """Print each page against its budget; returns how many pages failed.
+
+    A measured page with no baseline entry fails, as does a baseline page
+    that was not measured (unless the run was limited with --page), so the
+    gate cannot pass by having nothing to compare.
+    """
+    failures = 0
+    print(f"{'page':<28}{'stmts':>7}{'budget':>8}{'rows':>9}{'budget':>9}{'secs':>8}{'budget':>8}")
+    for name, got in results.items():
+        want = baseline["pages"].get(name)
+        if want is None:
+            failures += 1
+            print(f"{name:<28}{got['statements']:>7}{'-':>8}{got['rows']:>9}{'-':>9}{got['seconds']:>8.3f}{'-':>8}"
+                  "  NO BASELINE")
+            continue
+        over = [label for label, key, m in (("statements", "statements", margin), ("rows", "rows", margin),
+                                            ("time", "seconds", time_margin))
+                if over_budget(got[key], want[key], m)]
+        failures += bool(over)
+        print(f"{name:<28}{got['statements']:>7}{want['statements']:>8}{got['rows']:>9}{want['rows']:>9}"
+              f"{got['seconds']:>8.3f}{want['seconds']:>8.3f}" + (f"  OVER: {', '.join(over)}" if over else ""))
+    for name in baseline["pages"]:
+        if name not in results and not (only and name not in only):
+            failures += 1
+            print(f"{name:<28}  NOT MEASURED (page missing from this run)")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("seed", help="insert the deterministic fixture dataset")
+    p.add_argument("--orgs", type=int, default=2)
+    p.add_argument("--patents", type=int, default=2000, help="patents per organization")
+    p.add_argument("--seed", type=int, default=7)
+    for command in ("record", "check"):
+        p = sub.add_parser(command, help=f"{command} per-page numbers")
+        p.add_argument("--repeat", type=int, default=3, help="runs per page; wall time is the median")
+        p.add_argument("--page", action="append", help="limit to these pages (repeatable)")
+        if command == "check":
+            p.add_argument("--margin", type=float, help="allowed growth in statements/rows (default from baseline)")
+            p.add_argument("--time-margin", type=float, help="allowed growth in wall time (default from baseline)")
+    args = ap.parse_args()
+
+    if args.command == "seed":
+        conn = patent_db.connect()
+        try:
+            seed(conn, args.orgs, args.patents, args.seed)
+        finally:
+            conn.close()
+        return
+
+    baseline = load_baseline()
+    results = measure_all(args.repeat, args.page)
+    if args.command == "record":
+        baseline["pages"].update(results)
+        with open(BASELINE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Recorded {len(results)} page(s) in {os.path.relpath(BASELINE, ROOT)}")
+        return
+
+    margin = baseline["margin"] if args.margin is None else args.margin
+    time_margin = baseline["time_margin"] if args.time_margin is None else args.time_margin
+    failures = check(results, baseline, margin, time_margin, args.page)
+    if not baseline["pages"]:
+        print("Baseline has no pages yet; run `page_budgets.py record` against the seeded database and commit the file.")
+    if failures:
+        print(f"{failures} page(s) failed their budget.")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
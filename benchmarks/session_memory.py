@@ -0,0 +1,102 @@
+"""Bytes held per session by each page's result set: dict rows vs compact frames.
+
+Builds synthetic cursor rows shaped like each page's query, then measures
+the old representation (cursor(dictionary=True) rows, plus the label->record
+dict on the pages that built one for a selectbox) against
+patent_db.compact_frame.
+
+    python benchmarks/session_memory.py --rows 5000
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import patent_db  # noqa: E402
+
+DOMAINS = ["Quantum Computing", "Biotechnology", "Robotics", "Energy", "Materials", "Software"]
+REVIEW_STATUSES = ["Assigned", "In Progress", "Completed"]
+DECISIONS = [None, "Approved", "Rejected", "Needs Revision"]
+# Pages whose old code also kept a "Title (ID:n)" label map for a selectbox.
+LABELLED_PAGES = {"get_patent_list"}
+
+
+def deep_sizeof(obj, seen=None):
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def _day(rng):
+    return date(2005, 1, 1) + timedelta(days=rng.randrange(7300))
+
+
+def _title(rng, i):
+    return f"Method and apparatus {i} for {rng.choice(DOMAINS).lower()} systems"
+
+
+def make_rows(page, n, rng):
+    if page == "admin_overview":
+        cols = patent_db.PATENT_GRID_COLUMNS
+        rows = [(i, f"Applicant {i % 200}", _day(rng), rng.choice(DOMAINS), rng.choice(patent_db.PATENT_STATUSES),
+                 rng.choice(patent_db.PATENT_TYPES), _title(rng, i), "Detailed description of the claimed invention. " * 4)
+                for i in range(1, n + 1)]
+    elif page == "get_patent_list":
+        cols = ["P_ID", "Title", "Filing_Date", "Domain", "Status", "Patent_Type", "Appl_Name"]
+        rows = [(i, _title(rng, i), _day(rng), rng.choice(DOMAINS), rng.choice(patent_db.PATENT_STATUSES),
+                 rng.choice(patent_db.PATENT_TYPES), f"Applicant {i % 200}") for i in range(1, n + 1)]
+    elif page == "inventor_my_patents":
+        cols = ["P_ID", "Title", "Status", "Filing_Date", "Domain", "Patent_Type"]
+        rows = [(i, _title(rng, i), rng.choice(patent_db.PATENT_STATUSES), _day(rng), rng.choice(DOMAINS),
+                 rng.choice(patent_db.PATENT_TYPES)) for i in range(1, n + 1)]
+    elif page == "reviewer_assigned_reviews":
+        cols = patent_db.REVIEW_ASSIGNMENT_COLUMNS
+        rows = [(i, _title(rng, i), _day(rng), rng.choice(REVIEW_STATUSES), _day(rng), rng.choice(DECISIONS),
+                 "Reviewed claims against prior art.") for i in range(1, n + 1)]
+    else:
+        raise ValueError(page)
+    return cols, rows
+
+
+def legacy_bytes(cols, rows, labelled):
+    dict_rows = [dict(zip(cols, r)) for r in rows]
+    if not labelled:
+        return deep_sizeof(dict_rows)
+    labels = {f"{r['Title']} (ID:{r['P_ID']})": r for r in dict_rows}
+    # One shared `seen` set: the label map's values are the same row dicts.
+    return deep_sizeof((dict_rows, labels))
+
+
+def compact_bytes(cols, rows):
+    df = patent_db.compact_frame(rows, cols)
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=5000, help="rows per page result set")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'page':<28}{'dict rows (B)':>16}{'compact (B)':>16}{'ratio':>8}")
+    for page in ("admin_overview", "get_patent_list", "inventor_my_patents", "reviewer_assigned_reviews"):
+        cols, rows = make_rows(page, args.rows, rng)
+        before = legacy_bytes(cols, rows, page in LABELLED_PAGES)
+        after = compact_bytes(cols, rows)
+        print(f"{page:<28}{before:>16,}{after:>16,}{before / after:>8.1f}")
+    print(f"(bytes per session at {args.rows:,} rows per page; pyarrow {'on' if patent_db.pa else 'off'})")
+
+
+if __name__ == "__main__":
+    main()
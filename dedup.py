@@ -0,0 +1,99 @@
+"""MinHash/LSH near-duplicate detection over patent Title + Description.
+
+A patent's text is reduced to character 5-gram shingles and a NUM_PERM-value
+MinHash signature, whose agreement rate estimates the Jaccard similarity of
+two texts. The signature is cut into BANDS bands of ROWS values; patents that
+share any band bucket are candidates, which puts the detection threshold near
+(1 / BANDS) ** (1 / ROWS) ~= 0.55. Candidates are then confirmed against
+DUPLICATE_THRESHOLD using their full signatures.
+
+Signatures and buckets are stored in MySQL by patent_db, so the index persists
+and is updated in the same transaction as each filing. Changing any constant
+here invalidates the stored index; rebuild it with `python jobs.py dedup-scan --rebuild`.
+"""
+import hashlib
+import re
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+NUM_PERM = 100
+BANDS = 20
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5
+DUPLICATE_THRESHOLD = 0.6
+
+_PRIME = (1 << 31) - 1
+
+
+def _coefficient(tag, i):
+    # Derived from a fixed digest rather than an RNG so every process and
+    # NumPy version agrees on the hash family.
+    digest = hashlib.blake2b(f"{tag}{i}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % (_PRIME - 1) + 1
+
+
+_A = np.array([_coefficient("a", i) for i in range(NUM_PERM)], dtype=np.uint64)
+_B = np.array([_coefficient("b", i) for i in range(NUM_PERM)], dtype=np.uint64)
+
+
+def document(title, description) -> str:
+    """Indexed text; matches MySQL's CONCAT_WS(' ', Title, Description)."""
+    return " ".join(t for t in (title, description) if t is not None)
+
+
+def text_crc(text) -> int:
+    """CRC-32 of the indexed text; equal to MySQL's CRC32() on the same string."""
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def shingles(text) -> np.ndarray:
+    norm = " ".join(re.findall(r"\w+", text.lower()))
+    grams = {norm[i:i + SHINGLE] for i in range(max(len(norm) - SHINGLE + 1, 1))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)) % _PRIME
+
+
+def signature(text) -> np.ndarray:
+    hashed = (np.outer(shingles(text), _A) + _B) % _PRIME
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def band_keys(sig) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs; buckets are signed 64-bit so they fit a BIGINT column."""
+    keys = []
+    for band in range(BANDS):
+        chunk = sig[band * ROWS:(band + 1) * ROWS].astype("<u4").tobytes()
+        bucket = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big", signed=True)
+        keys.append((band, bucket))
+    return keys
+
+
+def similarity(a, b) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def to_bytes(sig) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(data) -> np.ndarray:
+    return np.frombuffer(data, dtype="<u4")
+
+
+def cluster(p_ids: Iterable[int], edges: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+    """Union-find over confirmed duplicate pairs; maps each P_ID to its cluster's lowest P_ID."""
+    parent = {p: p for p in p_ids}
+
+    def find(p):
+        while parent[p] != p:
+            parent[p] = parent[parent[p]]
+            p = parent[p]
+        return p
+
+    for a, b in edges:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    return {p: find(p) for p in parent}
@@ -0,0 +1,91 @@
+"""Background jobs for the Patent Lifecycle Management System.
+
+    python jobs.py dispatch-outbox --sink file:outbox.jsonl [--once]
+    python jobs.py snapshot [--date YYYY-MM-DD]
+    python jobs.py dedup-scan [--rebuild]
+    python jobs.py archive
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date
+
+import outbox
+import patent_db
+
+log = logging.getLogger(__name__)
+
+
+def cmd_dispatch_outbox(args):
+    sinks = [outbox.sink_from_spec(s) for s in args.sink]
+    dispatcher = outbox.OutboxDispatcher(sinks, batch_size=args.batch_size, max_attempts=args.max_attempts)
+    asyncio.run(dispatcher.run(interval=args.interval, once=args.once))
+
+
+def cmd_snapshot(args):
+    conn = patent_db.connect()
+    try:
+        written = patent_db.take_snapshot(conn, args.date)
+    finally:
+        conn.close()
+    log.info("Wrote %d portfolio snapshot row(s) for %s", written, args.date)
+
+
+def cmd_dedup_scan(args):
+    conn = patent_db.connect()
+    try:
+        indexed = patent_db.index_pending_patents(conn, batch_size=args.batch_size, rebuild=args.rebuild)
+        log.info("Indexed %d patent(s) for duplicate detection", indexed)
+        for org_id in patent_db.get_organizations(conn)["Org_ID"]:
+            clustered = patent_db.cluster_duplicates(conn, int(org_id))
+            log.info("Org %s: %d patent(s) in duplicate clusters", org_id, clustered)
+    finally:
+        conn.close()
+
+
+def cmd_archive(args):
+    conn = patent_db.connect()
+    try:
+        for org_id in patent_db.get_organizations(conn)["Org_ID"]:
+            moved = patent_db.archive_patents(conn, int(org_id), chunk_size=args.chunk_size, pause=args.pause)
+            log.info("Org %s: archived %d patent(s)", org_id, moved)
+    finally:
+        conn.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Patent system background jobs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("dispatch-outbox", help="deliver status-change events to notification sinks")
+    p.add_argument("--sink", action="append", required=True, help="file:PATH or smtp:HOST[:PORT] (repeatable)")
+    p.add_argument("--batch-size", type=int, default=100)
+    p.add_argument("--max-attempts", type=int, default=5)
+    p.add_argument("--interval", type=float, default=5.0, help="seconds between polls when the outbox is empty")
+    p.add_argument("--once", action="store_true", help="drain the outbox and exit")
+    p.set_defaults(func=cmd_dispatch_outbox)
+
+    p = sub.add_parser("snapshot", help="record today's portfolio aggregates for the trend charts")
+    p.add_argument("--date", type=date.fromisoformat, default=date.today(), help="snapshot date (default: today)")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser("dedup-scan", help="index new/edited patents and re-cluster likely duplicates")
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--rebuild", action="store_true", help="re-index every patent (after changing dedup.py settings)")
+    p.set_defaults(func=cmd_dedup_scan)
+
+    p = sub.add_parser("archive", help="move expired and withdrawn patents to the archive tables")
+    p.add_argument("--chunk-size", type=int, default=500, help="patents moved per transaction")
+    p.add_argument("--pause", type=float, default=0.1, help="seconds between chunks")
+    p.set_defaults(func=cmd_archive)
+    return parser
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Prometheus-style counters and histograms for the app and database layer.
+
+Metrics live in a process-wide registry and are exposed in the Prometheus
+text format, either from a local scrape endpoint (start_http_server) or by
+rewriting a file for node_exporter's textfile collector (write_textfile).
+No third-party client library is needed.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_str(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = []
+    for name, value in zip(labelnames, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def total(self):
+        return sum(self._values.values())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self):
+        return sum(s[-1] for s in self._series.values())
+
+    def sum(self, **labels):
+        series = self._series.get(tuple(labels.get(n, "") for n in self.labelnames))
+        return series[-2] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, n in zip(self.buckets, series):
+                    labels = _label_str(self.labelnames + ("le",), key + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {n}")
+                labels = _label_str(self.labelnames + ("le",), key + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                labels = _label_str(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {series[-2]}")
+                lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+PAGE_RENDER_SECONDS = REGISTRY.register(Histogram(
+    "patent_page_render_seconds", "Time to render a Streamlit page.", ["role", "page"]))
+PAGE_DB_STATEMENTS = REGISTRY.register(Histogram(
+    "patent_page_db_statements", "SQL statements issued while rendering a page or page section.", ["role", "page"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200)))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "patent_db_query_seconds", "Latency of SQL statements by statement kind.", ["operation"]))
+DB_QUERY_ERRORS = REGISTRY.register(Counter(
+    "patent_db_query_errors_total", "SQL statements that raised an error.", ["operation"]))
+DB_ROWS_FETCHED = REGISTRY.register(Counter(
+    "patent_db_rows_fetched_total", "Rows returned to the application by SELECTs."))
+DB_CONNECTION_ERRORS = REGISTRY.register(Counter(
+    "patent_db_connection_errors_total", "Failed attempts to open a database connection.", ["target"]))
+LOGIN_ATTEMPTS = REGISTRY.register(Counter(
+    "patent_login_attempts_total", "Login form submissions.", ["role", "outcome"]))
+REVIEW_SUBMISSIONS = REGISTRY.register(Counter(
+    "patent_review_submissions_total", "Completed reviews by decision.", ["decision"]))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "patent_cache_requests_total", "Cache lookups; hit rate is hit / (hit + miss).", ["cache", "result"]))
+
+
+# Exposition
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, addr="127.0.0.1"):
+    """Serve /metrics from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_textfile(path):
+    """Atomically rewrite `path` with the current metrics."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp, path)
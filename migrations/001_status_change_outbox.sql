@@ -0,0 +1,37 @@
+-- Migration: status-change outbox.
+--
+-- Adds the outbox the dispatcher drains (jobs.py dispatch-outbox), the
+-- inventor's last-seen marker for "changes since your last visit", and
+-- re-creates the status trigger so it writes to the outbox as well.
+--
+--     mysql patent_system < migrations/001_status_change_outbox.sql
+
+ALTER TABLE Inventors ADD COLUMN Last_Seen_Event BIGINT NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS Status_Change_Outbox (
+    Event_ID BIGINT PRIMARY KEY AUTO_INCREMENT,
+    P_ID INT NOT NULL,
+    Old_Status VARCHAR(50),
+    New_Status VARCHAR(50),
+    Changed_By VARCHAR(50),
+    Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    Dispatched_At TIMESTAMP NULL DEFAULT NULL,
+    Attempts INT NOT NULL DEFAULT 0,
+    INDEX idx_outbox_pending (Dispatched_At, Event_ID),
+    INDEX idx_outbox_patent (P_ID, Event_ID)
+);
+
+DROP TRIGGER IF EXISTS after_patent_status_update;
+DELIMITER $$
+CREATE TRIGGER after_patent_status_update
+AFTER UPDATE ON Patents
+FOR EACH ROW
+BEGIN
+    IF OLD.Status <> NEW.Status THEN
+        INSERT INTO Patent_Status_Audit (P_ID, Old_Status, New_Status, Changed_By)
+        VALUES (OLD.P_ID, OLD.Status, NEW.Status, USER());
+        INSERT INTO Status_Change_Outbox (P_ID, Old_Status, New_Status, Changed_By)
+        VALUES (OLD.P_ID, OLD.Status, NEW.Status, USER());
+    END IF;
+END$$
+DELIMITER ;
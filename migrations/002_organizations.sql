@@ -0,0 +1,132 @@
+-- Migration: partition an existing database by organization (tenant).
+--
+-- Brings a database created before the Organizations table up to the schema
+-- in PES1UG23CS555_PES1UG23CS549.sql without dropping data. Run it once, in
+-- order with the other files in migrations/, against the app's database:
+--
+--     mysql patent_system < migrations/002_organizations.sql
+--
+-- Organizations are created from the distinct inventor organizations and
+-- patent applicant names. A patent joins the organization of its (first)
+-- inventor so inventors keep seeing their own filings; unlinked patents go
+-- by Appl_Name. Rows that cannot be matched land in 'Unassigned'.
+
+
+-- Organizations
+
+CREATE TABLE IF NOT EXISTS Organizations (
+    Org_ID INT PRIMARY KEY AUTO_INCREMENT,
+    Name VARCHAR(150) NOT NULL UNIQUE
+);
+
+INSERT IGNORE INTO Organizations (Name)
+SELECT DISTINCT TRIM(Organization) FROM Inventors
+WHERE Organization IS NOT NULL AND TRIM(Organization) <> ''
+UNION
+SELECT DISTINCT TRIM(Appl_Name) FROM Patents
+WHERE TRIM(Appl_Name) <> '';
+
+INSERT IGNORE INTO Organizations (Name) VALUES ('Unassigned');
+
+
+-- Add nullable Org_ID columns, backfill, then tighten
+
+ALTER TABLE Inventors ADD COLUMN Org_ID INT NULL AFTER I_ID;
+ALTER TABLE Patents ADD COLUMN Org_ID INT NULL AFTER P_ID;
+ALTER TABLE Renewals ADD COLUMN Org_ID INT NULL AFTER R_No;
+ALTER TABLE Patents_Opposition ADD COLUMN Org_ID INT NULL AFTER O_ID;
+
+-- Inventors: by their organization name, else by the applicant of their first patent
+UPDATE Inventors I
+JOIN Organizations O ON O.Name = TRIM(I.Organization)
+SET I.Org_ID = O.Org_ID;
+
+UPDATE Inventors I
+JOIN (
+    SELECT IP.I_ID, MIN(IP.P_ID) AS P_ID
+    FROM Inventor_Patents IP
+    GROUP BY IP.I_ID
+) F ON F.I_ID = I.I_ID
+JOIN Patents P ON P.P_ID = F.P_ID
+JOIN Organizations O ON O.Name = TRIM(P.Appl_Name)
+SET I.Org_ID = O.Org_ID
+WHERE I.Org_ID IS NULL;
+
+-- Patents: by their first inventor's organization, else by applicant name
+UPDATE Patents P
+JOIN (
+    SELECT IP.P_ID, MIN(IP.I_ID) AS I_ID
+    FROM Inventor_Patents IP
+    GROUP BY IP.P_ID
+) F ON F.P_ID = P.P_ID
+JOIN Inventors I ON I.I_ID = F.I_ID
+SET P.Org_ID = I.Org_ID;
+
+UPDATE Patents P
+JOIN Organizations O ON O.Name = TRIM(P.Appl_Name)
+SET P.Org_ID = O.Org_ID
+WHERE P.Org_ID IS NULL;
+
+-- Renewals follow their patent
+UPDATE Renewals R
+JOIN Patents P ON P.P_ID = R.P_ID
+SET R.Org_ID = P.Org_ID;
+
+-- Oppositions name the patent by title; ambiguous titles take the lowest Org_ID
+UPDATE Patents_Opposition PO
+JOIN (
+    SELECT LEFT(Title, 50) AS Title, MIN(Org_ID) AS Org_ID
+    FROM Patents
+    GROUP BY LEFT(Title, 50)
+) T ON T.Title = PO.Patent_Title
+SET PO.Org_ID = T.Org_ID;
+
+-- Anything left over
+SET @unassigned = (SELECT Org_ID FROM Organizations WHERE Name = 'Unassigned');
+UPDATE Inventors SET Org_ID = @unassigned WHERE Org_ID IS NULL;
+UPDATE Patents SET Org_ID = @unassigned WHERE Org_ID IS NULL;
+UPDATE Renewals SET Org_ID = @unassigned WHERE Org_ID IS NULL;
+UPDATE Patents_Opposition SET Org_ID = @unassigned WHERE Org_ID IS NULL;
+DELETE FROM Organizations
+WHERE Org_ID = @unassigned
+  AND NOT EXISTS (SELECT 1 FROM Inventors WHERE Org_ID = @unassigned)
+  AND NOT EXISTS (SELECT 1 FROM Patents WHERE Org_ID = @unassigned)
+  AND NOT EXISTS (SELECT 1 FROM Renewals WHERE Org_ID = @unassigned)
+  AND NOT EXISTS (SELECT 1 FROM Patents_Opposition WHERE Org_ID = @unassigned);
+
+ALTER TABLE Inventors
+    MODIFY Org_ID INT NOT NULL,
+    ADD INDEX idx_inventors_org (Org_ID, Name),
+    ADD FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID);
+
+ALTER TABLE Patents
+    MODIFY Org_ID INT NOT NULL,
+    ADD INDEX idx_patents_org_status (Org_ID, Status),
+    ADD INDEX idx_patents_org_domain (Org_ID, Domain),
+    ADD INDEX idx_patents_org_type (Org_ID, Patent_Type),
+    ADD INDEX idx_patents_org_title (Org_ID, Title),
+    ADD FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID);
+
+ALTER TABLE Renewals
+    MODIFY Org_ID INT NOT NULL,
+    ADD INDEX idx_renewals_org_expiry (Org_ID, Expiry_Date),
+    ADD FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID);
+
+ALTER TABLE Patents_Opposition
+    MODIFY Org_ID INT NOT NULL,
+    ADD INDEX idx_opposition_org_date (Org_ID, O_Date),
+    ADD FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID);
+
+
+-- Procedure: Get patents by domain (within one organization)
+
+DROP PROCEDURE IF EXISTS GetPatentsByDomain;
+DELIMITER $$
+CREATE PROCEDURE GetPatentsByDomain(IN p_org_id INT, IN p_domain VARCHAR(100))
+BEGIN
+    SELECT P_ID, Title, Appl_Name, Filing_Date, Status, All_Reviews_Complete
+    FROM Patents
+    WHERE Org_ID = p_org_id AND Domain = p_domain
+    ORDER BY Filing_Date DESC;
+END$$
+DELIMITER ;
@@ -0,0 +1,14 @@
+-- Migration: daily portfolio snapshots for the Admin Overview trend charts.
+-- Needs Organizations (002). Schedule `python jobs.py snapshot` afterwards.
+--
+--     mysql patent_system < migrations/003_portfolio_snapshots.sql
+
+CREATE TABLE IF NOT EXISTS Portfolio_Snapshots (
+    Org_ID INT NOT NULL,
+    Metric VARCHAR(30) NOT NULL,
+    Snap_Date DATE NOT NULL,
+    Dim VARCHAR(100) NOT NULL DEFAULT '',
+    Value INT NOT NULL,
+    PRIMARY KEY (Org_ID, Metric, Snap_Date, Dim),
+    FOREIGN KEY (Org_ID) REFERENCES Organizations(Org_ID)
+);
@@ -0,0 +1,5 @@
+-- Migration: index read by the reviewer expertise index's incremental refresh.
+--
+--     mysql patent_system < migrations/004_reviewer_index.sql
+
+ALTER TABLE Patent_Reviewers ADD INDEX idx_reviews_status_date (Review_Status, Review_Date);
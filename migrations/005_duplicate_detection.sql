@@ -0,0 +1,35 @@
+-- Migration: near-duplicate detection tables.
+-- Existing patents are not indexed yet; run `python jobs.py dedup-scan` once
+-- afterwards to index them and build the first duplicate clusters.
+--
+--     mysql patent_system < migrations/005_duplicate_detection.sql
+
+CREATE TABLE IF NOT EXISTS Patent_Signatures (
+    P_ID INT PRIMARY KEY,
+    Org_ID INT NOT NULL,
+    Text_CRC INT UNSIGNED NOT NULL,
+    Signature VARBINARY(400) NOT NULL,
+    FOREIGN KEY (P_ID) REFERENCES Patents(P_ID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Patent_LSH_Buckets (
+    Org_ID INT NOT NULL,
+    Band TINYINT UNSIGNED NOT NULL,
+    Bucket BIGINT NOT NULL,
+    P_ID INT NOT NULL,
+    PRIMARY KEY (Org_ID, Band, Bucket, P_ID),
+    INDEX idx_lsh_patent (P_ID),
+    FOREIGN KEY (P_ID) REFERENCES Patents(P_ID) ON DELETE CASCADE
+);
+
+-- Output of the nightly clustering scan (jobs.py dedup-scan); Cluster_ID is
+-- the lowest P_ID in the cluster.
+CREATE TABLE IF NOT EXISTS Patent_Duplicate_Clusters (
+    P_ID INT PRIMARY KEY,
+    Org_ID INT NOT NULL,
+    Cluster_ID INT NOT NULL,
+    Similarity DECIMAL(4,3) NOT NULL,
+    Scanned_At DATETIME NOT NULL,
+    INDEX idx_clusters_org (Org_ID, Cluster_ID),
+    FOREIGN KEY (P_ID) REFERENCES Patents(P_ID) ON DELETE CASCADE
+);
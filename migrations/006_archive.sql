@@ -0,0 +1,91 @@
+-- Migration: archive tier for expired and withdrawn patents.
+-- Creates the *_Archive tables and the All_* views over live and archived
+-- rows. Nothing is moved until `python jobs.py archive` runs.
+--
+--     mysql patent_system < migrations/006_archive.sql
+
+CREATE TABLE IF NOT EXISTS Patents_Archive (
+    P_ID INT PRIMARY KEY,
+    Org_ID INT NOT NULL,
+    Appl_Name VARCHAR(30) NOT NULL,
+    Filing_Date DATE NOT NULL,
+    Domain VARCHAR(30),
+    Status VARCHAR(50) NOT NULL,
+    Patent_Type ENUM('Utility','Design','Plant') NOT NULL,
+    Title VARCHAR(100) NOT NULL,
+    Description TEXT NOT NULL,
+    All_Reviews_Complete BOOLEAN,
+    Final_Review_Date DATE,
+    Archived_At DATETIME NOT NULL,
+    INDEX idx_patents_archive_org_status (Org_ID, Status),
+    INDEX idx_patents_archive_org_title (Org_ID, Title)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Costs_Archive (
+    Cost_ID INT PRIMARY KEY,
+    P_ID INT,
+    Cost_Type VARCHAR(20),
+    Amount DECIMAL(10, 2) NOT NULL,
+    Date_Paid DATE,
+    INDEX idx_costs_archive_patent (P_ID)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Renewals_Archive (
+    R_No INT PRIMARY KEY,
+    Org_ID INT NOT NULL,
+    P_ID INT,
+    R_Date DATE,
+    Fee_Status VARCHAR(20),
+    Expiry_Date DATE NOT NULL,
+    INDEX idx_renewals_archive_patent (P_ID)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Patent_Reviewers_Archive (
+    P_ID INT,
+    R_ID INT,
+    Reviewer_Name VARCHAR(20) NOT NULL,
+    Assignment_Date DATE,
+    Review_Date DATE,
+    Review_Status VARCHAR(50),
+    Decision VARCHAR(100),
+    Comments TEXT,
+    PRIMARY KEY (P_ID, R_ID),
+    INDEX idx_reviewers_archive_reviewer (R_ID),
+    INDEX idx_reviewers_archive_status_date (Review_Status, Review_Date)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Patent_Stages_Archive (
+    P_ID INT,
+    Stage_Name VARCHAR(100),
+    Stage_Date DATE,
+    Stage_Status VARCHAR(50),
+    Review_Complete BOOLEAN,
+    Completed_By VARCHAR(100),
+    Completion_Date DATE,
+    PRIMARY KEY (P_ID, Stage_Name)
+) ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS Inventor_Patents_Archive (
+    I_ID INT,
+    P_ID INT,
+    PRIMARY KEY (I_ID, P_ID),
+    INDEX idx_inventor_patents_archive_patent (P_ID)
+) ROW_FORMAT=COMPRESSED;
+
+-- "Include archived" read path: live and archived rows behind one name.
+CREATE OR REPLACE VIEW All_Patents AS
+    SELECT P_ID, Org_ID, Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description, FALSE AS Archived
+    FROM Patents
+    UNION ALL
+    SELECT P_ID, Org_ID, Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description, TRUE
+    FROM Patents_Archive;
+
+CREATE OR REPLACE VIEW All_Inventor_Patents AS
+    SELECT I_ID, P_ID FROM Inventor_Patents
+    UNION ALL
+    SELECT I_ID, P_ID FROM Inventor_Patents_Archive;
+
+CREATE OR REPLACE VIEW All_Patent_Reviewers AS
+    SELECT * FROM Patent_Reviewers
+    UNION ALL
+    SELECT * FROM Patent_Reviewers_Archive;
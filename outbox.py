@@ -0,0 +1,123 @@
+"""Asynchronous dispatcher for the status-change outbox.
+
+Drains Status_Change_Outbox in batches (patent_db.dispatch_outbox_batch) and
+hands each batch to pluggable sinks. A sink is any object with a
+send(events) method taking a list of patent_db.StatusChange; FileSink and
+SmtpSink are provided, and a local SMTP debugging server (for example
+`python -m aiosmtpd -n -l localhost:1025`) is enough to exercise SmtpSink.
+"""
+import asyncio
+import json
+import logging
+import smtplib
+from email.message import EmailMessage
+
+import mysql.connector
+
+import patent_db
+
+log = logging.getLogger(__name__)
+
+
+# Sinks
+
+class FileSink:
+    """Append one JSON line per event."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, events):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for e in events:
+                record = e._asdict()
+                record["Created_At"] = e.Created_At.isoformat() if e.Created_At else None
+                record["Recipients"] = list(e.Recipients)
+                f.write(json.dumps(record) + "\n")
+
+
+class SmtpSink:
+    """Mail each inventor of the patent; events without recipients are skipped."""
+
+    def __init__(self, host="localhost", port=25, sender="noreply@patent-system.local"):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send(self, events):
+        with smtplib.SMTP(self.host, self.port) as smtp:
+            for e in events:
+                if not e.Recipients:
+                    continue
+                msg = EmailMessage()
+                msg["From"] = self.sender
+                msg["To"] = ", ".join(e.Recipients)
+                msg["Subject"] = f"Patent {e.P_ID} status changed to {e.New_Status}"
+                msg.set_content(
+                    f"The status of \"{e.Title or f'patent {e.P_ID}'}\" changed from "
+                    f"{e.Old_Status} to {e.New_Status} at {e.Created_At}."
+                )
+                smtp.send_message(msg)
+
+
+def sink_from_spec(spec):
+    """Build a sink from a CLI spec: file:PATH or smtp:HOST[:PORT]."""
+    kind, _, arg = spec.partition(":")
+    if kind == "file" and arg:
+        return FileSink(arg)
+    if kind == "smtp":
+        host, _, port = arg.partition(":")
+        return SmtpSink(host or "localhost", int(port or 25))
+    raise ValueError(f"Unknown sink spec: {spec!r} (use file:PATH or smtp:HOST[:PORT])")
+
+
+# Dispatcher
+
+class OutboxDispatcher:
+    def __init__(self, sinks, batch_size=100, max_attempts=5, connect=patent_db.connect):
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self._connect = connect
+        self._conn = None
+
+    def _deliver(self, events):
+        for sink in self.sinks:
+            sink.send(events)
+
+    def dispatch_once(self):
+        """Deliver one batch; returns how many events were delivered."""
+        if self._conn is None:
+            self._conn = self._connect()
+        try:
+            return patent_db.dispatch_outbox_batch(self._conn, self._deliver, self.batch_size, self.max_attempts)
+        except mysql.connector.Error:
+            # Drop the connection so the next batch reconnects.
+            self.close()
+            raise
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except mysql.connector.Error:
+                pass
+            self._conn = None
+
+    async def run(self, interval=5.0, once=False):
+        """Drain full batches back to back, then poll every `interval` seconds."""
+        try:
+            while True:
+                try:
+                    delivered = await asyncio.to_thread(self.dispatch_once)
+                except Exception as e:
+                    log.warning("Outbox dispatch failed: %s", e)
+                    delivered = 0
+                if delivered:
+                    log.info("Delivered %d outbox event(s)", delivered)
+                if once and delivered < self.batch_size:
+                    return
+                if delivered < self.batch_size:
+                    await asyncio.sleep(interval)
+        finally:
+            self.close()
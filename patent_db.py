@@ -0,0 +1,1214 @@
+"""Data-access layer for the Patent Lifecycle Management System.
+
+Every SQL statement used by the Streamlit pages lives here so the same code
+can be called from CLI tools, background jobs and benchmarks without
+importing Streamlit. Functions take an open mysql.connector connection as
+their first argument, raise mysql.connector errors on failure and commit
+their own writes. Every statement is timed into the metrics registry.
+
+Data is partitioned by organization (tenant). Functions that read or write
+tenant data take `org_id` right after the connection and filter on it;
+reviewers are shared examiners, so paths keyed by R_ID are not tenant-scoped.
+"""
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+import numpy as np
+import pandas as pd
+
+import dedup
+import metrics
+
+try:
+    import pyarrow as pa
+except ImportError:  # frames fall back to object strings / datetime64 dates
+    pa = None
+
+log = logging.getLogger(__name__)
+
+
+# Connection
+#
+# The primary takes every write. Read-only pages may be served from replicas
+# listed in PATENT_DB_REPLICAS ("host:port,host:port"); a session that has
+# written stays on the primary for PATENT_DB_STICKY_SECONDS so it always
+# reads its own writes.
+
+LAST_WRITE_KEY = "_db_last_write"
+_routed_conns = {}  # id(conn) -> (router, is_replica) for connections checked out by a router
+
+def primary_config():
+    return dict(
+        host=os.environ.get("PATENT_DB_HOST", "localhost"),
+        port=int(os.environ.get("PATENT_DB_PORT", 3306)),
+        user=os.environ.get("PATENT_DB_USER", "root"),
+        password=os.environ.get("PATENT_DB_PASSWORD", "svarsha08112005"),
+        database=os.environ.get("PATENT_DB_NAME", "patent_system"),
+        autocommit=False
+    )
+
+def replica_configs():
+    configs = []
+    for entry in os.environ.get("PATENT_DB_REPLICAS", "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(":")
+        cfg = primary_config()
+        # Replicas only serve reads; autocommit avoids a stale snapshot being
+        # held open on a pooled connection between reruns.
+        cfg.update(host=host, port=int(port or 3306), autocommit=True)
+        configs.append(cfg)
+    return configs
+
+def connect(config=None, target="primary"):
+    try:
+        return mysql.connector.connect(**(config or primary_config()))
+    except mysql.connector.Error:
+        metrics.DB_CONNECTION_ERRORS.inc(target=target)
+        raise
+
+class ConnectionPool:
+    """mysql.connector pool that opens an overflow connection when exhausted."""
+
+    def __init__(self, name, config, size=None):
+        self.name = name
+        self.config = config
+        size = size or int(os.environ.get("PATENT_DB_POOL_SIZE", 5))
+        try:
+            self._pool = pooling.MySQLConnectionPool(pool_name=name, pool_size=size, **config)
+        except mysql.connector.Error:
+            metrics.DB_CONNECTION_ERRORS.inc(target=name)
+            raise
+
+    def get_connection(self):
+        try:
+            return self._pool.get_connection()
+        except PoolError:
+            return connect(self.config, target=self.name)
+        except mysql.connector.Error:
+            metrics.DB_CONNECTION_ERRORS.inc(target=self.name)
+            raise
+
+def make_pools():
+    """Build the primary pool and one pool per reachable replica.
+
+    Pools are process-wide; create them once and share them between sessions.
+    An unreachable replica is logged and skipped so reads fall back to the
+    primary instead of failing.
+    """
+    primary = ConnectionPool("primary", primary_config())
+    replicas = []
+    for i, cfg in enumerate(replica_configs()):
+        try:
+            replicas.append(ConnectionPool(f"replica{i}", cfg))
+        except mysql.connector.Error as e:
+            log.warning("Replica %s:%s unavailable: %s", cfg["host"], cfg["port"], e)
+    return primary, replicas
+
+def mark_session_written(session):
+    session[LAST_WRITE_KEY] = time.time()
+
+class ConnectionRouter:
+    """Hands out primary or replica connections for one script run.
+
+    `session` is any mutable mapping that outlives the run (Streamlit's
+    session_state, or a plain dict in jobs); it remembers the last write so
+    routing stays on the primary for `sticky_seconds` afterwards.
+    Connections are checked out lazily and returned by close().
+    """
+
+    def __init__(self, primary_pool, replica_pools=(), session=None, sticky_seconds=None):
+        self.primary_pool = primary_pool
+        self.replica_pools = list(replica_pools)
+        self.session = session if session is not None else {}
+        if sticky_seconds is None:
+            sticky_seconds = float(os.environ.get("PATENT_DB_STICKY_SECONDS", 30))
+        self.sticky_seconds = sticky_seconds
+        self._primary = None
+        self._replica = None
+
+    def primary(self):
+        if self._primary is None:
+            self._primary = self.primary_pool.get_connection()
+            _routed_conns[id(self._primary)] = (self, False)
+        return self._primary
+
+    def is_sticky(self):
+        last = self.session.get(LAST_WRITE_KEY)
+        return last is not None and time.time() - last < self.sticky_seconds
+
+    def reader(self):
+        if not self.replica_pools or self.is_sticky():
+            return self.primary()
+        if self._replica is None:
+            pool = random.choice(self.replica_pools)
+            try:
+                self._replica = pool.get_connection()
+            except mysql.connector.Error as e:
+                log.warning("Replica %s unavailable, reading from primary: %s", pool.name, e)
+                return self.primary()
+            _routed_conns[id(self._replica)] = (self, True)
+        return self._replica
+
+    def record_write(self):
+        mark_session_written(self.session)
+
+    def close(self):
+        for conn in (self._primary, self._replica):
+            if conn is not None:
+                _routed_conns.pop(id(conn), None)
+        for conn in (self._primary, self._replica):
+            if conn is not None:
+                try:
+                    conn.close()
+                except mysql.connector.Error:
+                    pass
+        self._primary = self._replica = None
+
+@contextmanager
+def transaction(conn, org_id=None, invalidate=True):
+    """Commit on success, roll back and re-raise on any error.
+
+    A commit drops the cached stats of `org_id`, or of every tenant if None.
+    Writes that touch no cached data pass invalidate=False.
+    """
+    try:
+        yield _cursor(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if invalidate:
+        clear_cache(org_id)
+
+
+# Typed return objects
+
+class PortfolioStats(NamedTuple):
+    total: int
+    granted: int
+    expired: int
+    renewals_due_30d: int
+
+class Account(NamedTuple):
+    user_id: int
+    name: str
+    org_id: Optional[int] = None
+
+class StatusChange(NamedTuple):
+    Event_ID: int
+    P_ID: int
+    Title: Optional[str]
+    Old_Status: Optional[str]
+    New_Status: Optional[str]
+    Created_At: datetime
+    Recipients: Tuple[str, ...]
+
+class FilingColumns(NamedTuple):
+    """Parallel column arrays for the vectorized lifecycle engine (lifecycle.py)."""
+    P_ID: np.ndarray
+    Filing_Date: np.ndarray  # datetime64[D]
+    Patent_Type: np.ndarray
+    Live: np.ndarray  # False once a patent is expired, withdrawn or rejected
+
+
+# Compact result frames
+#
+# List results come back as DataFrames built straight from cursor tuples:
+# low-cardinality labels are categoricals, other text is Arrow-backed and
+# *_Date columns are date32, so a page holds one packed column per field
+# rather than a Python dict per row.
+
+CATEGORY_COLUMNS = ("Status", "Domain", "Patent_Type", "Review_Status", "Decision")
+PATENT_STATUSES = ["Pending", "Under Review", "In Progress", "Approved", "Rejected", "Granted", "Expired", "Withdrawn"]
+PATENT_TYPES = ["Utility", "Design", "Plant"]
+
+def compact_frame(rows, columns, categoricals=CATEGORY_COLUMNS, known=None):
+    """Build a compact DataFrame from cursor rows.
+
+    `known` maps a categorical column to values that must be valid categories
+    even if absent from the rows (e.g. every status for an editable grid).
+    """
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    for col in df.columns:
+        kind = pd.api.types.infer_dtype(df[col], skipna=True)
+        if col in categoricals:
+            cats = set(df[col].dropna()) | set((known or {}).get(col, ()))
+            df[col] = pd.Categorical(df[col], categories=sorted(cats))
+        elif kind == "date":
+            df[col] = df[col].astype(pd.ArrowDtype(pa.date32())) if pa else pd.to_datetime(df[col])
+        elif kind == "string" and pa:
+            df[col] = df[col].astype("string[pyarrow]")
+    return df
+
+def _py(value):
+    # Missing values in Arrow/categorical columns come back as NA/NaN.
+    return None if pd.api.types.is_scalar(value) and pd.isna(value) else value
+
+
+# Query helpers
+
+_thread_stats = threading.local()
+
+def statements_in_thread() -> int:
+    """SQL statements run so far on the calling thread (one Streamlit session's script run)."""
+    return getattr(_thread_stats, "statements", 0)
+
+class _TimedCursor:
+    """Cursor proxy that records statement latency, errors and rows fetched."""
+
+    def __init__(self, cur):
+        self._cur = cur
+
+    def _run(self, operation, call, *args):
+        _thread_stats.statements = statements_in_thread() + 1
+        start = time.perf_counter()
+        try:
+            return call(*args)
+        except Exception:
+            metrics.DB_QUERY_ERRORS.inc(operation=operation)
+            raise
+        finally:
+            metrics.DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+    def execute(self, query, params=()):
+        words = query.split(None, 1)
+        return self._run(words[0].lower() if words else "unknown", self._cur.execute, query, params)
+
+    def callproc(self, name, args=()):
+        return self._run("call", self._cur.callproc, name, args)
+
+    def fetchall(self):
+        rows = self._cur.fetchall()
+        metrics.DB_ROWS_FETCHED.inc(len(rows))
+        return rows
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        if row is not None:
+            metrics.DB_ROWS_FETCHED.inc()
+        return row
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+def _cursor(conn):
+    return _TimedCursor(conn.cursor())
+
+def _fetchall(conn, query, params=None):
+    cur = _cursor(conn)
+    cur.execute(query, params or ())
+    return cur.fetchall()
+
+def _fetchone(conn, query, params=None):
+    cur = _cursor(conn)
+    cur.execute(query, params or ())
+    return cur.fetchone()
+
+def _scalar(conn, query, params=None):
+    row = _fetchone(conn, query, params)
+    return row[0] if row else None
+
+def df_from_query(conn, query, params=None, columns=None, **compact):
+    cur = _cursor(conn)
+    cur.execute(query, params or ())
+    rows = cur.fetchall()
+    if not columns:
+        columns = [c[0] for c in cur.description] if cur.description else None
+    return compact_frame(rows, columns, **compact)
+
+
+# Cached reads
+#
+# Tenant aggregates and the admin overview's section data are identical for
+# every session of that tenant, so they are kept process-wide per org_id for
+# PATENT_STATS_TTL seconds and dropped when a write for that tenant commits
+# through transaction(). Cached frames are shared: do not mutate them.
+#
+# Entries remember whether a replica filled them. A replica may lag behind a
+# commit that has already cleared the cache, so a session that is sticky to
+# the primary after a write skips replica-filled entries and reads its own
+# writes. Each clear also bumps a generation, and a read that overlapped a
+# clear is returned but not stored.
+
+STATS_TTL = float(os.environ.get("PATENT_STATS_TTL", 30))
+_cache = {}
+_cache_lock = threading.Lock()
+_generations = {None: 0}  # org_id -> clears so far; None counts clears of every tenant
+
+def _generation(org_id):
+    return _generations[None], _generations.get(org_id, 0)
+
+def is_replica(conn):
+    routed = _routed_conns.get(id(conn))
+    return bool(routed and routed[1])
+
+def _reads_own_writes(conn):
+    routed = _routed_conns.get(id(conn))
+    return bool(routed and routed[0].is_sticky())
+
+def cached(fn):
+    # Keyed on (function, org_id, *args); the connection is not part of the key.
+    @functools.wraps(fn)
+    def wrapper(conn, *args):
+        key = (fn.__name__,) + args
+        org_id = args[0] if args else None
+        now = time.monotonic()
+        entry = _cache.get(key)
+        if entry and entry[0] > now and not (entry[2] and _reads_own_writes(conn)):
+            metrics.CACHE_REQUESTS.inc(cache=fn.__name__, result="hit")
+            return entry[1]
+        metrics.CACHE_REQUESTS.inc(cache=fn.__name__, result="miss")
+        generation = _generation(org_id)
+        value = fn(conn, *args)
+        with _cache_lock:
+            if _generation(org_id) == generation:
+                _cache[key] = (now + STATS_TTL, value, is_replica(conn))
+        return value
+    return wrapper
+
+def clear_cache(org_id=None):
+    with _cache_lock:
+        _generations[org_id] = _generations.get(org_id, 0) + 1
+        if org_id is None:
+            _cache.clear()
+        else:
+            for key in [k for k in _cache if len(k) > 1 and k[1] == org_id]:
+                del _cache[key]
+
+
+# Organizations
+
+def get_organizations(conn) -> pd.DataFrame:
+    return df_from_query(conn, "SELECT Org_ID, Name FROM Organizations ORDER BY Name", columns=["Org_ID","Name"])
+
+def get_or_create_organization(conn, name) -> int:
+    with transaction(conn, invalidate=False) as cur:
+        cur.execute("INSERT IGNORE INTO Organizations (Name) VALUES (%s)", (name,))
+        cur.execute("SELECT Org_ID FROM Organizations WHERE Name=%s", (name,))
+        return cur.fetchone()[0]
+
+
+# Stats
+
+# Totals and expiries count archived patents too; the other stats describe
+# the live portfolio. Live and archived rows are counted separately rather
+# than through the All_Patents view, so each side uses its (Org_ID, Status)
+# index instead of the UNION ALL being materialized.
+
+def _count_with_archive(conn, org_id, where="", params=()):
+    return int(_scalar(conn, f"""
+        SELECT (SELECT COUNT(*) FROM Patents WHERE Org_ID=%s {where})
+             + (SELECT COUNT(*) FROM Patents_Archive WHERE Org_ID=%s {where})
+    """, (org_id, *params, org_id, *params)))
+
+def get_total_patents(conn, org_id) -> int:
+    return _count_with_archive(conn, org_id)
+
+def get_active_patents(conn, org_id) -> int:
+    return _scalar(conn, "SELECT COUNT(*) FROM Patents WHERE Org_ID=%s AND Status='Granted'", (org_id,))
+
+def get_expired_patents(conn, org_id) -> int:
+    return _count_with_archive(conn, org_id, "AND Status='Expired'")
+
+def get_upcoming_renewals(conn, org_id) -> int:
+    return _scalar(conn, """
+        SELECT COUNT(*) FROM Renewals
+        WHERE Org_ID=%s AND Expiry_Date > CURDATE() AND Expiry_Date <= DATE_ADD(CURDATE(), INTERVAL 30 DAY)
+    """, (org_id,))
+
+@cached
+def get_portfolio_stats(conn, org_id) -> PortfolioStats:
+    return PortfolioStats(
+        get_total_patents(conn, org_id),
+        get_active_patents(conn, org_id),
+        get_expired_patents(conn, org_id),
+        get_upcoming_renewals(conn, org_id),
+    )
+
+@cached
+def get_domain_counts(conn, org_id) -> pd.DataFrame:
+    return df_from_query(conn, "SELECT Domain, COUNT(*) as Count FROM Patents WHERE Org_ID=%s GROUP BY Domain", (org_id,),
+                         columns=["Domain","Count"])
+
+@cached
+def get_type_counts(conn, org_id) -> pd.DataFrame:
+    return df_from_query(conn, "SELECT Patent_Type, COUNT(*) as Count FROM Patents WHERE Org_ID=%s GROUP BY Patent_Type", (org_id,),
+                         columns=["Patent_Type","Count"])
+
+@cached
+def get_domains(conn, org_id) -> List[str]:
+    rows = _fetchall(conn, "SELECT DISTINCT Domain FROM Patents WHERE Org_ID=%s AND Domain IS NOT NULL ORDER BY Domain", (org_id,))
+    return [r[0] for r in rows]
+
+
+# Patents
+
+def get_patent_list(conn, org_id) -> pd.DataFrame:
+    return df_from_query(conn, "SELECT P_ID, Title, Filing_Date, Domain, Status, Patent_Type, Appl_Name FROM Patents WHERE Org_ID=%s ORDER BY Title",
+                         (org_id,), columns=["P_ID","Title","Filing_Date","Domain","Status","Patent_Type","Appl_Name"])
+
+PATENT_GRID_COLUMNS = ["P_ID","Appl_Name","Filing_Date","Domain","Status","Patent_Type","Title","Description"]
+
+@cached
+def get_patents_grid(conn, org_id) -> pd.DataFrame:
+    # Domain stays free text here so the editor accepts new domains.
+    return df_from_query(conn, "SELECT P_ID, Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description FROM Patents WHERE Org_ID=%s ORDER BY P_ID",
+                         (org_id,), columns=PATENT_GRID_COLUMNS, categoricals=("Status", "Patent_Type"),
+                         known={"Status": PATENT_STATUSES, "Patent_Type": PATENT_TYPES})
+
+GRID_EDITABLE_COLUMNS = PATENT_GRID_COLUMNS[1:]
+
+def save_patent_rows(conn, org_id, changes):
+    """Write back cells edited in the admin grid, given as {P_ID: {column: value}}.
+
+    Only the edited columns of the edited rows are written, so a grid served
+    from the cache cannot revert changes made elsewhere since it was read.
+    DB triggers fire on update.
+    """
+    with transaction(conn, org_id) as cur:
+        for p_id, row in changes.items():
+            columns = [c for c in GRID_EDITABLE_COLUMNS if c in row]
+            if not columns:
+                continue
+            cur.execute(f"UPDATE Patents SET {', '.join(f'{c}=%s' for c in columns)} WHERE P_ID=%s AND Org_ID=%s",
+                        tuple(_py(row[c]) for c in columns) + (p_id, org_id))
+
+def get_patent_status(conn, org_id, p_id) -> Optional[str]:
+    return _scalar(conn, "SELECT Status FROM Patents WHERE P_ID=%s AND Org_ID=%s", (p_id, org_id))
+
+def update_patent_status(conn, org_id, p_id, new_status):
+    with transaction(conn, org_id) as cur:
+        cur.execute("UPDATE Patents SET Status=%s WHERE P_ID=%s AND Org_ID=%s", (new_status, p_id, org_id))
+
+def add_patent(conn, org_id, inventor_id, appl_name, filing_date, domain, patent_type, title, description) -> int:
+    """Insert a Pending patent linked to the inventor and return its P_ID."""
+    with transaction(conn, org_id) as cur:
+        cur.execute("""
+            INSERT INTO Patents (Org_ID, Appl_Name, Filing_Date, Domain, Status, Patent_Type, Title, Description)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, (org_id, appl_name, filing_date.isoformat(), domain, "Pending", patent_type, title, description))
+        new_p_id = cur.lastrowid
+        cur.execute("INSERT INTO Inventor_Patents (I_ID, P_ID) VALUES (%s, %s)", (inventor_id, new_p_id))
+        _index_patent_text(cur, org_id, new_p_id, title, description)
+    return new_p_id
+
+def filing_columns(rows) -> FilingColumns:
+    """Decode (P_ID, epoch day, type code, live) integer rows; type codes are 1-based into PATENT_TYPES."""
+    data = np.array(rows, dtype=np.int64).reshape(-1, 4)
+    return FilingColumns(
+        data[:, 0],
+        data[:, 1].astype("datetime64[D]"),
+        np.array([None] + PATENT_TYPES, dtype=object)[data[:, 2]],
+        data[:, 3].astype(bool),
+    )
+
+@cached
+def get_filing_columns(conn, org_id) -> FilingColumns:
+    # All-integer rows convert to arrays in one step, even for a million patents.
+    rows = _fetchall(conn, f"""
+        SELECT P_ID, DATEDIFF(Filing_Date, '1970-01-01'),
+               FIELD(Patent_Type, {", ".join(["%s"] * len(PATENT_TYPES))}),
+               Status NOT IN ('Expired','Withdrawn','Rejected')
+        FROM Patents
+        WHERE Org_ID=%s
+    """, (*PATENT_TYPES, org_id))
+    return filing_columns(rows)
+
+def get_patent_titles(conn, org_id, p_ids) -> pd.DataFrame:
+    """P_ID and Title for the given patents of the org."""
+    p_ids = [int(p) for p in p_ids]
+    if not p_ids:
+        return pd.DataFrame(columns=["P_ID","Title"])
+    return df_from_query(conn, f"SELECT P_ID, Title FROM Patents WHERE Org_ID=%s AND P_ID IN ({','.join(['%s'] * len(p_ids))})",
+                         (org_id, *p_ids), columns=["P_ID","Title"])
+
+def get_patents_by_domain(conn, org_id, domain) -> pd.DataFrame:
+    """Run the GetPatentsByDomain procedure, falling back to a plain query."""
+    try:
+        cur = _cursor(conn)
+        cur.callproc("GetPatentsByDomain", [org_id, domain])
+        results = []
+        cols = None
+        for result in cur.stored_results():
+            results = result.fetchall()
+            metrics.DB_ROWS_FETCHED.inc(len(results))
+            cols = [c[0] for c in result.description] if result.description else None
+        if not results:
+            return pd.DataFrame()
+        return pd.DataFrame(results, columns=cols) if cols else pd.DataFrame(results)
+    except Exception:
+        return df_from_query(conn, "SELECT P_ID, Title, Appl_Name, Filing_Date, Status, All_Reviews_Complete FROM Patents WHERE Org_ID=%s AND Domain=%s ORDER BY Filing_Date DESC",
+                             (org_id, domain))
+
+def delete_patent(conn, org_id, p_id):
+    """Delete one patent; fails while Costs or Renewals still reference it (bulk deletes remove those)."""
+    with transaction(conn, org_id) as cur:
+        cur.execute("DELETE FROM Patents WHERE P_ID=%s AND Org_ID=%s", (p_id, org_id))
+
+
+# Bulk patent deletes
+#
+# Patents selected by a filter are deleted in keyset-ordered chunks, each in
+# its own short transaction, so locks on Patents are held for one chunk at a
+# time. Costs and Renewals reference Patents without ON DELETE CASCADE and are
+# deleted explicitly; the other child tables cascade.
+
+DELETED_CHILD_TABLES = ("Costs", "Renewals")
+CASCADED_CHILD_TABLES = ("Patent_Reviewers", "Patent_Stages", "Inventor_Patents",
+                         "Patent_Signatures", "Patent_LSH_Buckets", "Patent_Duplicate_Clusters")
+
+def _delete_patent_ids(cur, org_id, p_ids):
+    placeholders = ",".join(["%s"] * len(p_ids))
+    owned = f"SELECT P_ID FROM Patents WHERE P_ID IN ({placeholders}) AND Org_ID=%s"
+    for table in DELETED_CHILD_TABLES:
+        cur.execute(f"DELETE FROM {table} WHERE P_ID IN ({owned})", (*p_ids, org_id))
+    cur.execute(f"DELETE FROM Patents WHERE P_ID IN ({placeholders}) AND Org_ID=%s", (*p_ids, org_id))
+    return cur.rowcount
+
+def _patent_filter(org_id, statuses=None, filed_from=None, filed_to=None, domains=None):
+    clauses, params = ["P.Org_ID=%s"], [org_id]
+    if statuses:
+        clauses.append(f"P.Status IN ({','.join(['%s'] * len(statuses))})")
+        params.extend(statuses)
+    if domains:
+        clauses.append(f"P.Domain IN ({','.join(['%s'] * len(domains))})")
+        params.extend(domains)
+    if filed_from:
+        clauses.append("P.Filing_Date >= %s")
+        params.append(filed_from)
+    if filed_to:
+        clauses.append("P.Filing_Date <= %s")
+        params.append(filed_to)
+    return " AND ".join(clauses), params
+
+def preview_bulk_delete(conn, org_id, **criteria) -> pd.DataFrame:
+    """Rows a bulk delete would remove, per table."""
+    where, params = _patent_filter(org_id, **criteria)
+    counts = [("Patents", "deleted", _scalar(conn, f"SELECT COUNT(*) FROM Patents P WHERE {where}", params))]
+    for table in DELETED_CHILD_TABLES + CASCADED_CHILD_TABLES:
+        n = _scalar(conn, f"SELECT COUNT(*) FROM {table} C JOIN Patents P ON P.P_ID = C.P_ID WHERE {where}", params)
+        counts.append((table, "deleted" if table in DELETED_CHILD_TABLES else "cascade", n))
+    return pd.DataFrame(counts, columns=["Table","Action","Rows"])
+
+def _process_in_chunks(conn, org_id, where, params, action, chunk_size, pause, progress) -> int:
+    """Apply action(cur, org_id, p_ids) to matching patents one locked chunk per transaction."""
+    total = _scalar(conn, f"SELECT COUNT(*) FROM Patents P WHERE {where}", params)
+    done, last_p_id = 0, 0
+    while True:
+        with transaction(conn, org_id) as cur:
+            cur.execute(f"""
+                SELECT P.P_ID FROM Patents P
+                WHERE {where} AND P.P_ID > %s
+                ORDER BY P.P_ID
+                LIMIT %s
+                FOR UPDATE
+            """, (*params, last_p_id, chunk_size))
+            p_ids = [r[0] for r in cur.fetchall()]
+            if p_ids:
+                done += action(cur, org_id, p_ids)
+        if not p_ids:
+            return done
+        last_p_id = p_ids[-1]
+        if progress:
+            progress(done, total)
+        if len(p_ids) < chunk_size:
+            return done
+        time.sleep(pause)
+
+def bulk_delete_patents(conn, org_id, chunk_size=500, pause=0.1, progress=None, **criteria) -> int:
+    """Delete every patent matching the filter; returns how many were deleted.
+
+    `progress(done, total)` is called after each committed chunk; `pause`
+    seconds between chunks leave room for other writers.
+    """
+    if not any(criteria.values()):
+        raise ValueError("Refusing to bulk delete without a filter.")
+    where, params = _patent_filter(org_id, **criteria)
+    return _process_in_chunks(conn, org_id, where, params, _delete_patent_ids, chunk_size, pause, progress)
+
+
+# Archive
+#
+# Expired and withdrawn patents move, with their child rows, into the
+# *_Archive tables; reads that pass include_archived=True go through the
+# All_* views instead of the live tables.
+
+ARCHIVE_STATUSES = ("Expired", "Withdrawn")
+ARCHIVED_CHILD_TABLES = ("Costs", "Renewals", "Patent_Reviewers", "Patent_Stages", "Inventor_Patents")
+
+def _archive_patent_ids(cur, org_id, p_ids):
+    placeholders = ",".join(["%s"] * len(p_ids))
+    owned = f"SELECT P_ID FROM Patents WHERE P_ID IN ({placeholders}) AND Org_ID=%s"
+    for table in ARCHIVED_CHILD_TABLES:
+        cur.execute(f"INSERT INTO {table}_Archive SELECT * FROM {table} WHERE P_ID IN ({owned})", (*p_ids, org_id))
+    cur.execute(f"INSERT INTO Patents_Archive SELECT P.*, NOW() FROM Patents P WHERE P.P_ID IN ({placeholders}) AND P.Org_ID=%s",
+                (*p_ids, org_id))
+    return _delete_patent_ids(cur, org_id, p_ids)
+
+def archive_patents(conn, org_id, statuses=ARCHIVE_STATUSES, chunk_size=500, pause=0.1, progress=None) -> int:
+    """Move the org's patents in `statuses` to the archive tables; returns how many moved."""
+    where, params = _patent_filter(org_id, statuses=list(statuses))
+    return _process_in_chunks(conn, org_id, where, params, _archive_patent_ids, chunk_size, pause, progress)
+
+def _with_archive(select, params, include_archived=True):
+    """`select` over the live tables, plus the same join over their archives (UNION ALL).
+
+    `select` names tables as {Patents}, {Inventor_Patents} and
+    {Patent_Reviewers}. Each side joins live with live or archive with
+    archive, so both use their own indexes instead of the All_* views being
+    materialized. Append ORDER BY with unqualified column names.
+    """
+    live = select.format(Patents="Patents", Inventor_Patents="Inventor_Patents", Patent_Reviewers="Patent_Reviewers")
+    if not include_archived:
+        return live, tuple(params)
+    archived = select.format(Patents="Patents_Archive", Inventor_Patents="Inventor_Patents_Archive",
+                             Patent_Reviewers="Patent_Reviewers_Archive")
+    return f"{live} UNION ALL {archived}", tuple(params) * 2
+
+
+# Inventors
+
+def inventor_email_exists(conn, email) -> bool:
+    return _scalar(conn, "SELECT COUNT(*) FROM Inventors WHERE Email=%s", (email,)) > 0
+
+def register_inventor(conn, name, org, email, phone, password):
+    """Register an inventor as the first member of a new organization named `org`.
+
+    Self-registration never joins an existing organization, since that would
+    open the tenant's patents to anyone who knows its name.
+    """
+    org = (org or "").strip()
+    if not org:
+        raise ValueError("Organization is required.")
+    # A new tenant has nothing cached yet.
+    with transaction(conn, invalidate=False) as cur:
+        cur.execute("SELECT 1 FROM Organizations WHERE Name=%s", (org,))
+        if cur.fetchone():
+            raise ValueError(f"Organization '{org}' is already registered; ask its admin to add you.")
+        cur.execute("INSERT INTO Organizations (Name) VALUES (%s)", (org,))
+        org_id = cur.lastrowid
+        cur.execute("""
+            INSERT INTO Inventors (Org_ID, Name, Organization, Email, Phone_No, Password)
+            VALUES (%s,%s,%s,%s,%s,%s)
+        """, (org_id, name, org, email, phone, password))
+
+def authenticate_inventor(conn, email, password) -> Optional[Account]:
+    row = _fetchone(conn, "SELECT I_ID, Name, Org_ID FROM Inventors WHERE Email=%s AND Password=%s", (email, password))
+    return Account(*row) if row else None
+
+def count_inventor_patents(conn, org_id, inv_id) -> int:
+    return _scalar(conn, """
+        SELECT COUNT(DISTINCT IP.P_ID)
+        FROM Inventor_Patents IP
+        JOIN Patents P ON P.P_ID = IP.P_ID
+        WHERE IP.I_ID = %s AND P.Org_ID = %s
+    """, (inv_id, org_id))
+
+def get_inventor_patents(conn, org_id, inv_id, include_archived=False) -> pd.DataFrame:
+    query, params = _with_archive("""
+        SELECT P.P_ID, P.Title, P.Status, P.Filing_Date, P.Domain, P.Patent_Type
+        FROM {Patents} P
+        JOIN {Inventor_Patents} IP ON P.P_ID = IP.P_ID
+        WHERE IP.I_ID = %s AND P.Org_ID = %s
+    """, (inv_id, org_id), include_archived)
+    return df_from_query(conn, query + " ORDER BY Filing_Date DESC", params,
+                         columns=["P_ID","Title","Status","Filing_Date","Domain","Patent_Type"])
+
+def delete_inventor(conn, org_id, i_id):
+    with transaction(conn, org_id) as cur:
+        cur.execute("DELETE FROM Inventors WHERE I_ID=%s AND Org_ID=%s", (i_id, org_id))
+
+
+# Reviewers
+
+def reviewer_email_exists(conn, email) -> bool:
+    return _scalar(conn, "SELECT COUNT(*) FROM Reviewers WHERE Email=%s", (email,)) > 0
+
+def register_reviewer(conn, name, designation, org, email, password):
+    with transaction(conn) as cur:
+        cur.execute("""
+            INSERT INTO Reviewers (Email, Name, Designation, Organisation, Comment, Password, Is_Active)
+            VALUES (%s,%s,%s,%s,%s,%s,TRUE)
+        """, (email, name, designation, org, "", password))
+
+def authenticate_reviewer(conn, email, password) -> Optional[Account]:
+    row = _fetchone(conn, "SELECT R_ID, Name FROM Reviewers WHERE Email=%s AND Password=%s AND Is_Active=TRUE", (email, password))
+    return Account(*row) if row else None
+
+def get_active_reviewers(conn) -> pd.DataFrame:
+    return df_from_query(conn, "SELECT R_ID, Name, Email FROM Reviewers WHERE Is_Active=TRUE ORDER BY Name", columns=["R_ID","Name","Email"])
+
+def get_reviewer_profiles(conn) -> List[tuple]:
+    """(R_ID, Name, Email, Designation, Comment) for every active reviewer."""
+    return _fetchall(conn, "SELECT R_ID, Name, Email, Designation, Comment FROM Reviewers WHERE Is_Active=TRUE")
+
+def get_completed_reviews_since(conn, since=None) -> List[tuple]:
+    """(P_ID, R_ID, Review_Date, Domain, Title) for reviews completed on or after `since` (all when None).
+
+    Archived reviews are included, so the history survives the archive job.
+    """
+    select = """
+        SELECT PR.P_ID, PR.R_ID, PR.Review_Date, P.Domain, P.Title
+        FROM {Patent_Reviewers} PR
+        JOIN {Patents} P ON P.P_ID = PR.P_ID
+        WHERE PR.Review_Status = 'Completed'
+    """
+    if since is None:
+        return _fetchall(conn, *_with_archive(select, ()))
+    return _fetchall(conn, *_with_archive(select + " AND PR.Review_Date >= %s", (since,)))
+
+def get_pending_review_counts(conn) -> dict:
+    return dict(_fetchall(conn, """
+        SELECT R_ID, COUNT(*) FROM Patent_Reviewers
+        WHERE Review_Status <> 'Completed'
+        GROUP BY R_ID
+    """))
+
+@cached
+def get_reviewer_workload(conn, org_id) -> pd.DataFrame:
+    """Completed/pending review counts per reviewer on this tenant's patents.
+
+    Completed reviews include archived ones; pending reviews are live only.
+    """
+    return df_from_query(conn, """
+        SELECT R.R_ID, R.Name, R.Email,
+          COALESCE(L.CompletedReviews, 0) + COALESCE(A.CompletedReviews, 0) AS CompletedReviews,
+          COALESCE(L.PendingReviews, 0) AS PendingReviews
+        FROM Reviewers R
+        LEFT JOIN (
+          SELECT PR.R_ID,
+            SUM(CASE WHEN PR.Review_Status='Completed' THEN 1 ELSE 0 END) AS CompletedReviews,
+            SUM(CASE WHEN PR.Review_Status <> 'Completed' AND PR.Review_Status IS NOT NULL THEN 1 ELSE 0 END) AS PendingReviews
+          FROM Patent_Reviewers PR
+          JOIN Patents P ON P.P_ID = PR.P_ID AND P.Org_ID = %s
+          GROUP BY PR.R_ID
+        ) L ON L.R_ID = R.R_ID
+        LEFT JOIN (
+          SELECT PR.R_ID, COUNT(*) AS CompletedReviews
+          FROM Patent_Reviewers_Archive PR
+          JOIN Patents_Archive P ON P.P_ID = PR.P_ID AND P.Org_ID = %s
+          WHERE PR.Review_Status = 'Completed'
+          GROUP BY PR.R_ID
+        ) A ON A.R_ID = R.R_ID
+        ORDER BY PendingReviews DESC
+    """, (org_id, org_id))
+
+def assign_reviewers(conn, org_id, p_id, r_ids) -> int:
+    """Assign each reviewer not already on the patent; returns how many were added."""
+    assigned = 0
+    with transaction(conn, org_id) as cur:
+        cur.execute("SELECT COUNT(*) FROM Patents WHERE P_ID=%s AND Org_ID=%s", (p_id, org_id))
+        if cur.fetchone()[0] == 0:
+            raise ValueError(f"Patent {p_id} does not belong to this organization.")
+        for r_id in r_ids:
+            cur.execute("SELECT COUNT(*) FROM Patent_Reviewers WHERE P_ID=%s AND R_ID=%s", (p_id, r_id))
+            if cur.fetchone()[0] == 0:
+                cur.execute("""
+                    INSERT INTO Patent_Reviewers (P_ID, R_ID, Reviewer_Name, Assignment_Date, Review_Status)
+                    VALUES (%s, %s, (SELECT Name FROM Reviewers WHERE R_ID=%s), CURDATE(), 'Assigned')
+                """, (p_id, r_id, r_id))
+                assigned += 1
+    return assigned
+
+def get_patent_assignments(conn, p_id) -> pd.DataFrame:
+    return df_from_query(conn, """
+        SELECT PR.R_ID, PR.Reviewer_Name, PR.Assignment_Date, PR.Review_Status, PR.Review_Date, PR.Decision
+        FROM Patent_Reviewers PR
+        WHERE PR.P_ID=%s
+        ORDER BY PR.Assignment_Date DESC
+    """, (p_id,), columns=["R_ID","Reviewer_Name","Assignment_Date","Review_Status","Review_Date","Decision"])
+
+REVIEW_ASSIGNMENT_COLUMNS = ["P_ID","Title","Assignment_Date","Review_Status","Review_Date","Decision","Comments"]
+
+def get_reviewer_assignments(conn, r_id, order_by="Assignment_Date", include_archived=False) -> pd.DataFrame:
+    if order_by not in ("Assignment_Date", "Review_Date"):
+        raise ValueError(f"Unsupported ordering: {order_by}")
+    query, params = _with_archive("""
+        SELECT PR.P_ID, P.Title, PR.Assignment_Date, PR.Review_Status, PR.Review_Date, PR.Decision, PR.Comments
+        FROM {Patent_Reviewers} PR
+        JOIN {Patents} P ON PR.P_ID = P.P_ID
+        WHERE PR.R_ID = %s
+    """, (r_id,), include_archived)
+    return df_from_query(conn, query + f" ORDER BY {order_by} DESC", params, columns=REVIEW_ASSIGNMENT_COLUMNS)
+
+def submit_review(conn, p_id, r_id, decision, comments):
+    """Complete the assignment and carry the decision onto the patent status."""
+    org_id = _scalar(conn, "SELECT Org_ID FROM Patents WHERE P_ID=%s", (p_id,))
+    with transaction(conn, org_id) as cur:
+        cur.execute("""
+            UPDATE Patent_Reviewers
+            SET Review_Status = 'Completed', Decision = %s, Comments = %s, Review_Date = CURDATE()
+            WHERE P_ID = %s AND R_ID = %s
+        """, (decision, comments, p_id, r_id))
+        cur.execute("UPDATE Patents SET Status=%s WHERE P_ID=%s", (decision, p_id))
+    metrics.REVIEW_SUBMISSIONS.inc(decision=decision)
+
+def delete_reviewer(conn, r_id) -> bool:
+    """Soft-delete: the reviewer can no longer log in or be assigned, but their review history stays."""
+    with transaction(conn) as cur:
+        cur.execute("UPDATE Reviewers SET Is_Active=FALSE, Deleted_Date=CURDATE() WHERE R_ID=%s AND Is_Active=TRUE", (r_id,))
+        return cur.rowcount > 0
+
+def restore_reviewer(conn, r_id) -> bool:
+    with transaction(conn) as cur:
+        cur.execute("UPDATE Reviewers SET Is_Active=TRUE, Deleted_Date=NULL WHERE R_ID=%s AND Is_Active=FALSE", (r_id,))
+        return cur.rowcount > 0
+
+def delete_review_assignment(conn, org_id, p_id, r_id):
+    with transaction(conn, org_id) as cur:
+        cur.execute("""
+            DELETE PR FROM Patent_Reviewers PR
+            JOIN Patents P ON P.P_ID = PR.P_ID
+            WHERE PR.P_ID=%s AND PR.R_ID=%s AND P.Org_ID=%s
+        """, (p_id, r_id, org_id))
+
+
+# Renewals & costs
+
+def get_multi_renewal_patents(conn, org_id) -> pd.DataFrame:
+    """Patents with at least two paid renewals, with their titles."""
+    df = df_from_query(conn, """
+        SELECT P_ID, COUNT(R_No) AS NumberOfRenewals
+        FROM Renewals
+        WHERE Org_ID = %s AND Fee_Status LIKE '%Paid%'
+        GROUP BY P_ID
+        HAVING COUNT(R_No) >= 2
+    """, (org_id,), columns=["P_ID","NumberOfRenewals"])
+    if df.empty:
+        return df
+    p_ids = df["P_ID"].tolist()
+    placeholders = ",".join(["%s"] * len(p_ids))
+    titles = _fetchall(conn, f"SELECT P_ID, Title FROM Patents WHERE P_ID IN ({placeholders})", p_ids)
+    titles_map = {t[0]: t[1] for t in titles}
+    df["Title"] = df["P_ID"].map(titles_map)
+    return df[["P_ID","Title","NumberOfRenewals"]]
+
+def delete_renewal(conn, org_id, p_id, r_no):
+    with transaction(conn, org_id) as cur:
+        cur.execute("DELETE FROM Renewals WHERE P_ID=%s AND R_No=%s AND Org_ID=%s", (p_id, r_no, org_id))
+
+def delete_cost_entry(conn, org_id, cost_id):
+    with transaction(conn, org_id) as cur:
+        cur.execute("""
+            DELETE C FROM Costs C
+            JOIN Patents P ON P.P_ID = C.P_ID
+            WHERE C.Cost_ID=%s AND P.Org_ID=%s
+        """, (cost_id, org_id))
+
+
+# Oppositions
+
+def file_opposition(conn, org_id, email, patent_title, reason):
+    with transaction(conn, org_id) as cur:
+        cur.execute("INSERT INTO Patents_Opposition (Org_ID, Email, Patent_Title, O_Date, Reason) VALUES (%s,%s,%s,CURDATE(),%s)",
+                    (org_id, email, patent_title, reason))
+
+@cached
+def get_latest_oppositions(conn, org_id, limit=20) -> pd.DataFrame:
+    return df_from_query(conn, """
+        SELECT O.O_ID, O.Email, O.Patent_Title, O.O_Date, O.Reason
+        FROM Patents_Opposition O
+        WHERE O.Org_ID = %s
+        ORDER BY O.O_Date DESC LIMIT %s
+    """, (org_id, limit), columns=["O_ID","Email","Patent_Title","O_Date","Reason"])
+
+def delete_opposition(conn, org_id, o_id):
+    with transaction(conn, org_id) as cur:
+        cur.execute("DELETE FROM Patents_Opposition WHERE O_ID=%s AND Org_ID=%s", (o_id, org_id))
+
+
+# Status-change outbox
+#
+# Status_Change_Outbox is filled by the after_patent_status_update trigger in
+# the same transaction as the change (admin update, grid save, review).
+
+def get_changes_since_last_visit(conn, inv_id) -> pd.DataFrame:
+    return df_from_query(conn, """
+        SELECT O.Event_ID, O.P_ID, P.Title, O.Old_Status, O.New_Status, O.Created_At
+        FROM Inventors I
+        JOIN Inventor_Patents IP ON IP.I_ID = I.I_ID
+        JOIN Status_Change_Outbox O ON O.P_ID = IP.P_ID AND O.Event_ID > I.Last_Seen_Event
+        LEFT JOIN Patents P ON P.P_ID = O.P_ID
+        WHERE I.I_ID = %s
+        ORDER BY O.Event_ID DESC
+    """, (inv_id,), columns=["Event_ID","P_ID","Title","Old_Status","New_Status","Created_At"],
+        categoricals=("Old_Status", "New_Status"))
+
+def mark_changes_seen(conn, inv_id, event_id):
+    with transaction(conn, invalidate=False) as cur:
+        cur.execute("UPDATE Inventors SET Last_Seen_Event = GREATEST(Last_Seen_Event, %s) WHERE I_ID=%s", (event_id, inv_id))
+
+def dispatch_outbox_batch(conn, handler, batch_size=100, max_attempts=5) -> int:
+    """Claim up to `batch_size` undelivered events and pass them to `handler`.
+
+    Rows are locked with SKIP LOCKED so several dispatchers can drain the
+    outbox concurrently. If the handler raises, the batch stays undelivered
+    with its Attempts bumped; events reaching `max_attempts` are left for
+    inspection. Returns the number of events delivered.
+    """
+    error = None
+    with transaction(conn, invalidate=False) as cur:
+        cur.execute("""
+            SELECT O.Event_ID, O.P_ID, P.Title, O.Old_Status, O.New_Status, O.Created_At
+            FROM Status_Change_Outbox O
+            LEFT JOIN Patents P ON P.P_ID = O.P_ID
+            WHERE O.Dispatched_At IS NULL AND O.Attempts < %s
+            ORDER BY O.Event_ID
+            LIMIT %s
+            FOR UPDATE OF O SKIP LOCKED
+        """, (max_attempts, batch_size))
+        rows = cur.fetchall()
+        if not rows:
+            return 0
+        p_ids = sorted({r[1] for r in rows})
+        cur.execute(f"""
+            SELECT IP.P_ID, I.Email
+            FROM Inventor_Patents IP
+            JOIN Inventors I ON I.I_ID = IP.I_ID
+            WHERE IP.P_ID IN ({",".join(["%s"] * len(p_ids))}) AND I.Email IS NOT NULL
+        """, p_ids)
+        recipients = {}
+        for p_id, email in cur.fetchall():
+            recipients.setdefault(p_id, []).append(email)
+        try:
+            handler([StatusChange(*r, tuple(recipients.get(r[1], ()))) for r in rows])
+        except Exception as e:
+            error = e
+        event_ids = [r[0] for r in rows]
+        cur.execute(f"""
+            UPDATE Status_Change_Outbox
+            SET Attempts = Attempts + 1, Dispatched_At = {"NULL" if error else "CURRENT_TIMESTAMP"}
+            WHERE Event_ID IN ({",".join(["%s"] * len(event_ids))})
+        """, event_ids)
+    if error:
+        raise error
+    return len(rows)
+
+
+# Portfolio snapshots
+#
+# The nightly job stores compact per-tenant daily aggregates so trend charts
+# read a small indexed range instead of replaying Patent_Status_Audit.
+
+SNAPSHOT_METRICS = {
+    "status": "Patents by status",
+    "domain": "Patents by domain",
+    "type": "Patents by type",
+    "pending_reviews": "Pending reviews per reviewer",
+    "renewals_due": "Renewals due in the next 30 days",
+}
+
+def take_snapshot(conn, snap_date) -> int:
+    """Write every tenant's aggregates for `snap_date`, replacing any earlier run.
+
+    Counts reflect the current state of the tables, so run it daily; the date
+    only labels the snapshot (and anchors the renewals-due window). Patent
+    counts include the archive, so archiving does not bend the trend lines.
+    Returns the number of snapshot rows written.
+    """
+    with transaction(conn) as cur:
+        cur.execute("DELETE FROM Portfolio_Snapshots WHERE Snap_Date=%s", (snap_date,))
+        written = 0
+        for metric, column in (("status", "Status"), ("domain", "COALESCE(Domain, '(none)')"), ("type", "Patent_Type")):
+            # Group each table on its own, then add the (small) grouped results.
+            cur.execute(f"""
+                INSERT INTO Portfolio_Snapshots (Org_ID, Metric, Snap_Date, Dim, Value)
+                SELECT Org_ID, %s, %s, Dim, SUM(N)
+                FROM (
+                    SELECT Org_ID, {column} AS Dim, COUNT(*) AS N FROM Patents GROUP BY Org_ID, {column}
+                    UNION ALL
+                    SELECT Org_ID, {column}, COUNT(*) FROM Patents_Archive GROUP BY Org_ID, {column}
+                ) T
+                GROUP BY Org_ID, Dim
+            """, (metric, snap_date))
+            written += cur.rowcount
+        cur.execute("""
+            INSERT INTO Portfolio_Snapshots (Org_ID, Metric, Snap_Date, Dim, Value)
+            SELECT P.Org_ID, 'pending_reviews', %s, CONCAT(R.Name, ' (#', R.R_ID, ')'), COUNT(*)
+            FROM Patent_Reviewers PR
+            JOIN Patents P ON P.P_ID = PR.P_ID
+            JOIN Reviewers R ON R.R_ID = PR.R_ID
+            WHERE PR.Review_Status <> 'Completed'
+            GROUP BY P.Org_ID, R.R_ID, R.Name
+        """, (snap_date,))
+        written += cur.rowcount
+        cur.execute("""
+            INSERT INTO Portfolio_Snapshots (Org_ID, Metric, Snap_Date, Dim, Value)
+            SELECT Org_ID, 'renewals_due', %s, '', COUNT(*)
+            FROM Renewals
+            WHERE Expiry_Date > %s AND Expiry_Date <= DATE_ADD(%s, INTERVAL 30 DAY)
+            GROUP BY Org_ID
+        """, (snap_date, snap_date, snap_date))
+        written += cur.rowcount
+    return written
+
+@cached
+def get_snapshot_series(conn, org_id, metric, start, end) -> pd.DataFrame:
+    if metric not in SNAPSHOT_METRICS:
+        raise ValueError(f"Unknown snapshot metric: {metric}")
+    return df_from_query(conn, """
+        SELECT Snap_Date, Dim, Value
+        FROM Portfolio_Snapshots
+        WHERE Org_ID=%s AND Metric=%s AND Snap_Date BETWEEN %s AND %s
+        ORDER BY Snap_Date
+    """, (org_id, metric, start, end), columns=["Snap_Date","Dim","Value"], categoricals=("Dim",))
+
+
+# Duplicate detection
+#
+# MinHash signatures and LSH buckets (see dedup.py) live next to the patents,
+# so a new filing is checked with a handful of primary-key lookups.
+
+def _index_patent_text(cur, org_id, p_id, title, description):
+    text = dedup.document(title, description)
+    sig = dedup.signature(text)
+    cur.execute("DELETE FROM Patent_LSH_Buckets WHERE P_ID=%s", (p_id,))
+    cur.execute("REPLACE INTO Patent_Signatures (P_ID, Org_ID, Text_CRC, Signature) VALUES (%s, %s, %s, %s)",
+                (p_id, org_id, dedup.text_crc(text), dedup.to_bytes(sig)))
+    cur.executemany("INSERT INTO Patent_LSH_Buckets (Org_ID, Band, Bucket, P_ID) VALUES (%s, %s, %s, %s)",
+                    [(org_id, band, bucket, p_id) for band, bucket in dedup.band_keys(sig)])
+
+# Candidates sharing the most bands with the filing are confirmed first.
+MAX_DUPLICATE_CANDIDATES = 500
+
+def find_similar_patents(conn, org_id, title, description, threshold=dedup.DUPLICATE_THRESHOLD, limit=5) -> pd.DataFrame:
+    """Existing patents in the org whose text likely duplicates the given filing."""
+    sig = dedup.signature(dedup.document(title, description))
+    keys = dedup.band_keys(sig)
+    rows = _fetchall(conn, f"""
+        SELECT P.P_ID, P.Title, P.Status, S.Signature
+        FROM (
+            SELECT P_ID FROM Patent_LSH_Buckets
+            WHERE Org_ID=%s AND ({" OR ".join(["(Band=%s AND Bucket=%s)"] * len(keys))})
+            GROUP BY P_ID
+            ORDER BY COUNT(*) DESC
+            LIMIT {MAX_DUPLICATE_CANDIDATES}
+        ) C
+        JOIN Patent_Signatures S ON S.P_ID = C.P_ID
+        JOIN Patents P ON P.P_ID = C.P_ID
+    """, (org_id, *[v for key in keys for v in key]))
+    matches = []
+    for p_id, p_title, status, stored in rows:
+        score = dedup.similarity(sig, dedup.from_bytes(stored))
+        if score >= threshold:
+            matches.append((p_id, p_title, status, score))
+    matches.sort(key=lambda m: -m[3])
+    return compact_frame(matches[:limit], ["P_ID","Title","Status","Similarity"])
+
+def index_pending_patents(conn, batch_size=500, rebuild=False) -> int:
+    """Index patents with no signature or whose text changed since indexing; returns how many."""
+    indexed, last_p_id = 0, 0
+    stale = "TRUE" if rebuild else "S.P_ID IS NULL OR S.Text_CRC <> CRC32(CONCAT_WS(' ', P.Title, P.Description))"
+    while True:
+        rows = _fetchall(conn, f"""
+            SELECT P.P_ID, P.Org_ID, P.Title, P.Description
+            FROM Patents P
+            LEFT JOIN Patent_Signatures S ON S.P_ID = P.P_ID
+            WHERE P.P_ID > %s AND ({stale})
+            ORDER BY P.P_ID
+            LIMIT %s
+        """, (last_p_id, batch_size))
+        if not rows:
+            return indexed
+        # Signatures and buckets are not cached; the clusters change in cluster_duplicates().
+        with transaction(conn, invalidate=False) as cur:
+            for p_id, org_id, title, description in rows:
+                _index_patent_text(cur, org_id, p_id, title, description)
+        indexed += len(rows)
+        last_p_id = rows[-1][0]
+
+def cluster_duplicates(conn, org_id, threshold=dedup.DUPLICATE_THRESHOLD) -> int:
+    """Rebuild the org's duplicate clusters from LSH bucket collisions; returns patents clustered."""
+    collisions = _fetchall(conn, """
+        SELECT B.Band, B.Bucket, B.P_ID
+        FROM Patent_LSH_Buckets B
+        JOIN (
+            SELECT Band, Bucket FROM Patent_LSH_Buckets
+            WHERE Org_ID=%s
+            GROUP BY Band, Bucket
+            HAVING COUNT(*) > 1
+        ) C ON C.Band = B.Band AND C.Bucket = B.Bucket
+        WHERE B.Org_ID=%s
+        ORDER BY B.Band, B.Bucket, B.P_ID
+    """, (org_id, org_id))
+    buckets = {}
+    for band, bucket, p_id in collisions:
+        buckets.setdefault((band, bucket), []).append(p_id)
+    p_ids = sorted({p for members in buckets.values() for p in members})
+    signatures = {}
+    for i in range(0, len(p_ids), 1000):
+        chunk = p_ids[i:i + 1000]
+        for p_id, stored in _fetchall(conn, f"SELECT P_ID, Signature FROM Patent_Signatures WHERE P_ID IN ({','.join(['%s'] * len(chunk))})", chunk):
+            signatures[p_id] = dedup.from_bytes(stored)
+
+    # Confirm each bucket member against the bucket's first patent; pairs seen
+    # in several bands are only scored once.
+    edges, best, scored = [], {}, set()
+    for members in buckets.values():
+        anchor = members[0]
+        for p_id in members[1:]:
+            if (anchor, p_id) in scored or anchor not in signatures or p_id not in signatures:
+                continue
+            scored.add((anchor, p_id))
+            score = dedup.similarity(signatures[anchor], signatures[p_id])
+            if score >= threshold:
+                edges.append((anchor, p_id))
+                for p in (anchor, p_id):
+                    best[p] = max(best.get(p, 0.0), score)
+    roots = dedup.cluster(best, edges)
+
+    with transaction(conn, org_id) as cur:
+        cur.execute("DELETE FROM Patent_Duplicate_Clusters WHERE Org_ID=%s", (org_id,))
+        cur.executemany("""
+            INSERT INTO Patent_Duplicate_Clusters (P_ID, Org_ID, Cluster_ID, Similarity, Scanned_At)
+            VALUES (%s, %s, %s, %s, NOW())
+        """, [(p_id, org_id, root, round(best[p_id], 3)) for p_id, root in roots.items()])
+    return len(roots)
+
+@cached
+def get_duplicate_clusters(conn, org_id) -> pd.DataFrame:
+    return df_from_query(conn, """
+        SELECT D.Cluster_ID, D.P_ID, P.Title, P.Status, D.Similarity, D.Scanned_At
+        FROM Patent_Duplicate_Clusters D
+        JOIN Patents P ON P.P_ID = D.P_ID
+        WHERE D.Org_ID=%s
+        ORDER BY D.Cluster_ID, D.P_ID
+    """, (org_id,), columns=["Cluster_ID","P_ID","Title","Status","Similarity","Scanned_At"])
+
+
+# Query viewers
+
+def get_join_view(conn, org_id) -> pd.DataFrame:
+    return df_from_query(conn, """
+        SELECT PR.P_ID, P.Title AS Patent, PR.R_ID AS Reviewer_ID, R.Name AS Reviewer_Name, PR.Review_Status
+        FROM Patent_Reviewers PR
+        JOIN Patents P ON PR.P_ID = P.P_ID
+        JOIN Reviewers R ON PR.R_ID = R.R_ID
+        WHERE P.Org_ID = %s
+        ORDER BY P.Title
+    """, (org_id,))
+
+def get_nested_view(conn, org_id) -> pd.DataFrame:
+    return df_from_query(conn, """
+        SELECT DISTINCT R.R_ID, R.Name, R.Email
+        FROM Reviewers R
+        WHERE R.R_ID IN (
+            SELECT PR.R_ID FROM Patent_Reviewers PR
+            WHERE PR.P_ID IN (
+                SELECT P_ID FROM Patents WHERE Org_ID = %s AND Status='Granted'
+            )
+        )
+        ORDER BY R.Name
+    """, (org_id,))
@@ -0,0 +1,134 @@
+"""In-memory reviewer expertise index for recommending reviewers.
+
+Each active reviewer gets a profile:
+- completed reviews per patent domain;
+- title vocabulary from the patents they reviewed;
+- keywords from their Designation and Comment;
+- current pending load.
+
+The index is built once from the full review history. After that, refresh()
+only folds in reviews completed since the last watermark and re-reads the
+small per-reviewer tables, so ranking a patent is a pass over the reviewers
+in memory.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+import weakref
+from collections import Counter
+from typing import Dict, List, NamedTuple, Set
+
+import patent_db
+
+REFRESH_SECONDS = 60
+DOMAIN_WEIGHT = 2.0   # per log(1 + completed reviews in the patent's domain)
+KEYWORD_WEIGHT = 1.0  # share of the patent's words found in Designation/Comment
+TOPIC_WEIGHT = 0.5    # share of the patent's title words seen in reviewed titles
+LOAD_PENALTY = 0.25   # per pending review
+
+_instances = weakref.WeakSet()
+
+STOPWORDS = {"and", "for", "the", "with", "based", "method", "system", "systems", "apparatus", "using", "from"}
+
+
+def tokens(*texts) -> Set[str]:
+    words = set()
+    for text in texts:
+        if text:
+            words.update(w for w in re.findall(r"[a-z0-9]+", str(text).lower()) if len(w) > 2 and w not in STOPWORDS)
+    return words
+
+
+class Recommendation(NamedTuple):
+    R_ID: int
+    Name: str
+    Email: str
+    Score: float
+    Domain_Reviews: int
+    Pending: int
+
+
+class _Profile:
+    __slots__ = ("name", "email", "keywords", "domains", "topics")
+
+    def __init__(self, name, email, keywords):
+        self.name = name
+        self.email = email
+        self.keywords = keywords
+        self.domains = Counter()
+        self.topics = Counter()
+
+
+class ReviewerIndex:
+    def __init__(self, refresh_seconds=REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._profiles: Dict[int, _Profile] = {}
+        self._history: Dict[int, tuple] = {}   # R_ID -> (domains, topics), kept across reviewer reloads
+        self._seen = set()                     # (P_ID, R_ID, Review_Date) folded in on the watermark day
+        self._pending: Dict[int, int] = {}
+        self._watermark = None                 # latest Review_Date folded in
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def mark_stale(self):
+        """Refresh on the next call, e.g. after a review is submitted or reviewers are assigned."""
+        self._next_refresh = 0.0
+
+    def refresh(self, conn, force=False):
+        if not force and time.monotonic() < self._next_refresh:
+            return
+        with self._lock:
+            # Review_Date is a day, so re-read the watermark day and skip rows already counted.
+            for p_id, r_id, review_date, domain, title in patent_db.get_completed_reviews_since(conn, self._watermark):
+                key = (p_id, r_id, review_date)
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                domains, topics = self._history.setdefault(r_id, (Counter(), Counter()))
+                domains[domain or ""] += 1
+                topics.update(tokens(title))
+                if review_date and (self._watermark is None or review_date > self._watermark):
+                    self._watermark = review_date
+            # Only the watermark day is read again, so older keys can go.
+            self._seen = {key for key in self._seen if key[2] == self._watermark}
+
+            profiles = {}
+            for r_id, name, email, designation, comment in patent_db.get_reviewer_profiles(conn):
+                profile = _Profile(name, email, tokens(designation, comment))
+                profile.domains, profile.topics = self._history.get(r_id, (Counter(), Counter()))
+                profiles[r_id] = profile
+            self._profiles = profiles
+            self._pending = patent_db.get_pending_review_counts(conn)
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+
+    def recommend(self, domain, title="", k=5, exclude=()) -> List[Recommendation]:
+        """Top-k active reviewers for a patent, best first."""
+        wanted = tokens(domain, title)
+        title_words = tokens(title)
+        excluded = set(exclude)
+        scored = []
+        for r_id, p in self._profiles.items():
+            if r_id in excluded:
+                continue
+            in_domain = p.domains.get(domain or "", 0)
+            pending = self._pending.get(r_id, 0)
+            score = DOMAIN_WEIGHT * math.log1p(in_domain) - LOAD_PENALTY * pending
+            if wanted:
+                score += KEYWORD_WEIGHT * len(wanted & p.keywords) / len(wanted)
+            if title_words:
+                score += TOPIC_WEIGHT * sum(1 for w in title_words if w in p.topics) / len(title_words)
+            scored.append(Recommendation(r_id, p.name, p.email, round(score, 3), in_domain, pending))
+        return heapq.nlargest(k, scored, key=lambda r: (r.Score, -r.Pending, -r.R_ID))
+
+    def rank(self, domain, title="") -> List[int]:
+        """Every indexed reviewer's R_ID, best match first."""
+        return [r.R_ID for r in self.recommend(domain, title, k=len(self._profiles))]
+
+
+def mark_all_stale():
+    """Make every index in the process refresh on next use (e.g. between benchmark runs)."""
+    for index in list(_instances):
+        index.mark_stale()